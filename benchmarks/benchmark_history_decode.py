@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Compares the chart data decoding of History against the previous pandas based decoding.
+#
+# Usage: python benchmarks/benchmark_history_decode.py [candles] [repeat]
+#
+import json
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import pyinvesting as ic
+from pyinvesting.jsonlib import loads, orjson
+
+def legacy_chart_data_frame(content):
+    
+    data = json.loads(content)
+    cols = ['datetime','open','high','low','close','volume','unknown']
+    df = pd.DataFrame(data['candles'], columns = cols)
+    df.drop(['unknown'], inplace=True, axis=1)
+    df.datetime = pd.to_datetime(df.datetime / 1000, unit='s')
+    return df
+
+def legacy_adv_chart_data_frame(content):
+    
+    data = json.loads(content)
+    df = pd.DataFrame(data['data'])
+    df['datetime'] = pd.to_datetime(df.date)
+    df = df[['datetime','open','high','low','close','volume']]
+    return df
+
+def get_payloads(count):
+    
+    rng = np.random.default_rng(0)
+    start = 1600000000000
+    close = 100 + np.cumsum(rng.normal(0, 0.1, count))
+    volume = rng.integers(0, 10000, count)
+    
+    candles = [[start + i * 300000, round(c + 0.05, 4), round(c + 0.1, 4), round(c - 0.1, 4), round(c, 4), int(v), 0] 
+        for i, (c, v) in enumerate(zip(close, volume))]
+    rows = [{'date': pd.Timestamp(candle[0], unit='ms').strftime('%Y-%m-%d %H:%M:%S'), 'open': candle[1], 'high': candle[2], 
+        'low': candle[3], 'close': candle[4], 'volume': candle[5], 'ask': candle[4]} for candle in candles]
+        
+    return json.dumps({'candles': candles}).encode(), json.dumps({'data': rows}).encode()
+
+def run(name, legacy, fast, repeat):
+    
+    pd.testing.assert_frame_equal(legacy(), fast(), check_dtype=False)
+    
+    legacy_time = min(timeit.repeat(legacy, number=repeat, repeat=3)) / repeat
+    fast_time = min(timeit.repeat(fast, number=repeat, repeat=3)) / repeat
+    print('{:<16} legacy: {:8.3f} ms   fast: {:8.3f} ms   speedup: {:5.1f}x'.format(
+        name, legacy_time * 1000, fast_time * 1000, legacy_time / fast_time))
+
+if __name__ == '__main__':
+    
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    history = ic.History()
+    chart, adv_chart = get_payloads(count)
+    
+    print('Candles: {} - JSON parser: {}'.format(count, 'orjson' if orjson else 'json'))
+    run('chart', lambda: legacy_chart_data_frame(chart), lambda: history._get_chart_data_frame(loads(chart)), repeat)
+    run('adv_chart', lambda: legacy_adv_chart_data_frame(adv_chart), lambda: history._get_adv_chart_data_frame(loads(adv_chart)), repeat)
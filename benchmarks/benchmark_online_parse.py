@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Compares the websocket quotes parsing of Online against the previous dataframe per message parsing.
+#
+# Usage: python benchmarks/benchmark_online_parse.py [messages]
+#
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyinvesting.online_parser import OnlineParser
+from pyinvesting.online_batcher import QuoteBatcher
+
+def get_messages(count):
+    
+    rng = np.random.default_rng(0)
+    messages = []
+    for i in range(count):
+        last = 30000 + rng.normal(0, 50)
+        quote = {'pid': str(8873 + i % 20), 'last_dir': 'greenBg', 'last_numeric': round(last, 1), 
+            'last': '{:,.1f}'.format(last), 'bid': '{:,.1f}'.format(last - 0.5), 'ask': '{:,.1f}'.format(last + 0.5), 
+            'high': '{:,.1f}'.format(last + 100), 'low': '{:,.1f}'.format(last - 100), 'last_close': '30,000.0', 
+            'pc': '{:+.1f}'.format(last - 30000), 'pcp': '{:+.2f}%'.format((last - 30000) / 300), 'pc_col': 'greenFont', 
+            'turnover': '12.3K', 'turnover_numeric': '12345', 'time': '14:05:03', 'timestamp': 1600000000 + i}
+        message = 'pid-{}::{}'.format(quote['pid'], json.dumps(quote, separators=(',', ':')))
+        messages.append('a' + json.dumps([json.dumps({'message': message}, separators=(',', ':'))]))
+        
+    return messages
+
+def get_frames(messages, size):
+    
+    # The streamer packs several messages in the same frame under load
+    items = [json.loads(message[1:])[0] for message in messages]
+    return ['a' + json.dumps(items[i:i + size]) for i in range(0, len(items), size)]
+
+def legacy(parser, messages, pid_map):
+    
+    # Previous Online._internal_on_quotes processing
+    for message in messages:
+        quotes = parser.get_quotes_from_message(message)
+        column = quotes['pair_id'].apply(lambda x: pid_map[x] if x in pid_map else x)
+        quotes.insert(0, 'ticker', column)
+        quotes.set_index('pair_id', inplace=True)
+
+def fast_dataframe(parser, messages, pid_map):
+    
+    for message in messages:
+        quote = parser.get_quote_from_message(message)
+        quote.ticker = pid_map.get(quote.pair_id, quote.pair_id)
+        parser.get_quotes_frame([quote])
+
+def fast_record(parser, messages, pid_map):
+    
+    for message in messages:
+        quote = parser.get_quote_from_message(message)
+        quote.ticker = pid_map.get(quote.pair_id, quote.pair_id)
+
+def fast_batched(parser, messages, pid_map):
+    
+    # One dataframe every 1000 quotes (Online batch_interval_ms)
+    batcher = QuoteBatcher(lambda quotes: None, max_size=1000)
+    for message in messages:
+        quote = parser.get_quote_from_message(message)
+        quote.ticker = pid_map.get(quote.pair_id, quote.pair_id)
+        batcher.add(quote)
+    batcher.flush()
+
+def fast_frame_record(parser, messages, pid_map):
+    
+    # Online parses every frame with get_frame_events (one message per frame)
+    for message in messages:
+        quotes, _ = parser.get_frame_events(message)
+        for quote in quotes:
+            quote.ticker = pid_map.get(quote.pair_id, quote.pair_id)
+
+def fast_frame_dataframe(parser, messages, pid_map):
+    
+    # Online delivers one dataframe with all the quotes of every frame
+    for message in messages:
+        quotes, _ = parser.get_frame_events(message)
+        for quote in quotes:
+            quote.ticker = pid_map.get(quote.pair_id, quote.pair_id)
+        parser.get_quotes_frame(quotes)
+
+def run(name, function, parser, messages, pid_map, base=None, count=None):
+    
+    start = time.perf_counter()
+    function(parser, messages, pid_map)
+    elapsed = time.perf_counter() - start
+    count = count if count else len(messages)
+    
+    print('{:<16} {:10.1f} us/msg {:12,.0f} msg/s {}'.format(name, elapsed / count * 1e6, count / elapsed, 
+        '  speedup: {:6.1f}x'.format(base / elapsed) if base else ''))
+    return elapsed
+
+if __name__ == '__main__':
+    
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    
+    parser = OnlineParser()
+    messages = get_messages(count)
+    pid_map = {8873 + i: 'TICKER{}'.format(i) for i in range(20)}
+    
+    # Both parsers must return the same quotes
+    legacy_frame = parser.get_quotes_from_message(messages[0])
+    fast_frame = parser.get_quote_from_message(messages[0]).to_frame().reset_index().drop(columns='ticker')
+    pd.testing.assert_frame_equal(legacy_frame, fast_frame, check_dtype=False)
+    
+    # The frames decoder must return all the messages of every frame
+    frames = get_frames(messages, 10)
+    quotes = [quote for frame in frames for quote in parser.get_frame_events(frame)[0]]
+    assert [quote.last for quote in quotes] == [parser.get_quote_from_message(message).last for message in messages]
+    
+    print('Messages: {}'.format(count))
+    base = run('legacy', legacy, parser, messages, pid_map)
+    run('fast dataframe', fast_dataframe, parser, messages, pid_map, base)
+    run('fast batched', fast_batched, parser, messages, pid_map, base)
+    run('fast record', fast_record, parser, messages, pid_map, base)
+    run('frame record', fast_frame_record, parser, messages, pid_map, base)
+    run('frame record x10', fast_frame_record, parser, frames, pid_map, base, count)
+    run('frame df x10', fast_frame_dataframe, parser, frames, pid_map, base, count)
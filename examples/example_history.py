@@ -38,4 +38,14 @@ print('GOOG history advanced chart - Timeframe: 1 minute')
 print(history.get_adv_chart_data(100160, timeframe='1M'))
 
 print('VIX history advanced chart - Timeframe: 1 day')
-print(history.get_adv_chart_data(44336, timeframe='1D'))
\ No newline at end of file
+print(history.get_adv_chart_data(44336, timeframe='1D'))
+
+print('MSFT, QQQ and AAPL history charts downloaded in parallel - Timeframe: 1 day')
+for pair, df, error in history.get_chart_data_many([252, 651, (6408, 'week')], interval='86400'):
+    print(pair, error if error else df.tail())
+
+print('MSFT history chart between two dates - Timeframe: 5 minutes')
+print(history.get_chart_data_range(252, '2020-01-01', '2020-06-30', interval='300'))
+
+print('MSFT history chart - Timeframe: 60 minutes (built locally from 5 minutes bars)')
+print(history.get_chart_data(252, interval='3600', count=24, derive_from='300'))
@@ -31,3 +31,7 @@ print(news)
 
 articles = search.articles('GOOG', 5)
 print(articles)
+
+# Search several terms in parallel, the duplicated terms are searched once
+tickers = search.tickers_many(['AAPL', 'aapl', 'MSFT', 'GOOG'], 5)
+print(tickers)
@@ -22,6 +22,19 @@ __version__ = "0.31"
 __author__ = "Diego Degese"
 __user_agent__ = 'pyinvesting/{}'.format(__version__)
 
+from .cache import ResponseCache
+from .rate_limiter import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from .transport import Transport, ThrottledError
+from .directory import InstrumentDirectory
 from .search import Search
+from .online_parser import QuoteRecord, QUOTE_DTYPE
 from .online import Online
+from .tick_journal import TickRecorder, TickReplay, JOURNAL_DTYPE
+from .online_bars import BarBuilder
+from .online_shared import QuotePublisher, QuoteSubscriber, SHARED_DTYPE
+from .online_gateway import QuoteGateway, QuoteGatewayClient
 from .history import History
+from .async_transport import AsyncTransport
+from .async_search import AsyncSearch
+from .async_online import AsyncOnline
+from .async_history import AsyncHistory
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import time
+
+_END = object()
+
+def run_many(function, items, max_workers=8, rate_limit=None):
+    """
+    Runs function(item) for every item on a bounded thread pool.
+
+    It is a generator that yields a tuple (item, result, error) as soon as each call finishes.
+    If the call raised an exception, result is None and error is the exception.
+    Only a few calls are queued ahead of the workers, so long lists do not hold all the results in memory.
+
+    Parameters
+    ----------
+    function : function(item)
+        Callable object executed for every item.
+    items : iterable
+        The items to be processed.
+    max_workers : int
+        Maximum number of calls running at the same time.
+    rate_limit : float, optional
+        Maximum number of calls started per second.
+        If it is not specified, the calls are started as soon as a worker is free.
+    """
+
+    max_workers = max(int(max_workers), 1)
+    min_delay = 1.0 / rate_limit if rate_limit else 0
+    next_start = time.monotonic()
+    items = iter(items)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while True:
+                # Keep the pool busy without queueing all the items at once
+                while len(pending) < max_workers * 2:
+                    item = next(items, _END)
+                    if item is _END:
+                        break
+                    pending[executor.submit(_run_at, function, item, next_start)] = item
+                    next_start = max(next_start, time.monotonic()) + min_delay
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield (item, None if error else future.result(), error)
+        finally:
+            for future in pending:
+                future.cancel()
+
+def _run_at(function, item, start):
+
+    delay = start - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+    return function(item)
+
+async def run_many_async(function, items, max_concurrency=32, rate_limit=None):
+    """
+    Runs the coroutine function(item) for every item with a bounded concurrency.
+
+    It is an asynchronous generator that yields a tuple (item, result, error) as soon as each call finishes.
+    If the call raised an exception, result is None and error is the exception.
+
+    Parameters
+    ----------
+    function : coroutine function(item)
+        Coroutine function executed for every item.
+    items : iterable
+        The items to be processed.
+    max_concurrency : int
+        Maximum number of calls running at the same time.
+    rate_limit : float, optional
+        Maximum number of calls started per second.
+        If it is not specified, the calls are started as soon as a previous one finishes.
+    """
+
+    max_concurrency = max(int(max_concurrency), 1)
+    min_delay = 1.0 / rate_limit if rate_limit else 0
+    next_start = time.monotonic()
+    items = iter(items)
+    pending = {}
+
+    try:
+        while True:
+            while len(pending) < max_concurrency:
+                item = next(items, _END)
+                if item is _END:
+                    break
+                pending[asyncio.ensure_future(_run_at_async(function, item, next_start))] = item
+                next_start = max(next_start, time.monotonic()) + min_delay
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                error = task.exception()
+                yield (item, None if error else task.result(), error)
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _run_at_async(function, item, start):
+
+    delay = start - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    return await function(item)
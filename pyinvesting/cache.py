@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from collections import OrderedDict
+from threading import Lock
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# Seconds that every endpoint response is kept in the cache.
+# The keys are the cache tags sent by the classes (endpoint:interval).
+DEFAULT_TTLS = {
+    'chart:60': 30,
+    'chart:300': 60,
+    'chart:900': 120,
+    'chart:1800': 300,
+    'chart:3600': 600,
+    'chart:18000': 1800,
+    'chart:86400': 3600,
+    'chart:week': 6 * 3600,
+    'chart:month': 24 * 3600,
+    'adv_chart:1M': 30,
+    'adv_chart:5M': 60,
+    'adv_chart:15M': 120,
+    'adv_chart:30M': 300,
+    'adv_chart:60M': 600,
+    'adv_chart:5H': 1800,
+    'adv_chart:1D': 3600,
+    'adv_chart:1W': 6 * 3600,
+    'adv_chart:1N': 24 * 3600,
+    'history': 24 * 3600,
+    'search:quotes': 24 * 3600,
+    'search:news': 300,
+    'search:articles': 900,
+    'streamer': 3600
+}
+
+class ResponseCache:
+    
+    def __init__(self, max_entries=1024, path=None, ttls=None, default_ttl=60):
+        """
+        Class constructor 
+        
+        The cache has two tiers, a bounded in-memory LRU and an optional on-disk directory.
+        The on-disk directory can be shared by several processes.
+        
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of responses kept in memory.
+        path : str, optional
+            The directory used to store the responses on disk.
+            If it is not specified, the responses are only kept in memory.
+        ttls : dict, optional
+            Seconds that the responses are kept for every cache tag. 
+            The values override the ones in DEFAULT_TTLS.
+            A tag can be an endpoint (Ex. chart) or an endpoint and interval (Ex. chart:60).
+            A value of 0 disables the cache for the tag.
+        default_ttl : int
+            Seconds that the responses are kept when the tag is not found.
+        """
+        
+        self._max_entries = max_entries
+        self._path = path
+        self._default_ttl = default_ttl
+        
+        self._ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self._ttls.update(ttls)
+        
+        if path:
+            os.makedirs(path, exist_ok=True)
+            
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get(self, key):
+        """
+        Returns the cached value for the key or None if it is not found or it is expired.
+        
+        Parameters
+        ----------
+        key : str
+            The key of the cached value.
+        """
+        
+        now = time.time()
+        expired = False
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                    
+                del self._entries[key]
+                expired = True
+                
+        entry, disk_expired = self._get_disk_entry(key, now)
+        
+        with self._lock:
+            if expired or disk_expired:
+                self._stats['expirations'] += 1
+                
+            if entry:
+                self._stats['disk_hits'] += 1
+                self._set_memory_entry(key, entry)
+                return entry[1]
+                
+            self._stats['misses'] += 1
+            
+        return None
+
+    def set(self, key, value, tag=None):
+        """
+        Stores a value in the cache.
+        
+        Parameters
+        ----------
+        key : str
+            The key of the cached value.
+        value : str
+            The value to be cached.
+        tag : str, optional
+            The tag used to get the time to live of the value.
+        """
+        
+        ttl = self.get_ttl(tag)
+        if ttl <= 0:
+            return
+            
+        entry = (time.time() + ttl, value)
+        
+        with self._lock:
+            self._set_memory_entry(key, entry)
+            
+        self._set_disk_entry(key, entry)
+
+    def get_ttl(self, tag):
+        """
+        Returns the seconds that the values with the specified tag are kept.
+        
+        Parameters
+        ----------
+        tag : str
+            The cache tag. Ex. chart:300
+        """
+        
+        if tag is None:
+            return self._default_ttl
+            
+        ttl = self._ttls.get(tag)
+        if ttl is None:
+            ttl = self._ttls.get(tag.split(':')[0], self._default_ttl)
+            
+        return ttl
+        
+    def clear(self):
+        """
+        Removes all the values from the memory and disk tiers.
+        """
+        
+        with self._lock:
+            self._entries.clear()
+            
+        if self._path:
+            for name in os.listdir(self._path):
+                if name.endswith('.json'):
+                    self._remove_file(os.path.join(self._path, name))
+
+    def stats(self):
+        """
+        Returns a dictionary with the cache counters.
+        
+        The keys are:
+            - hits: Values found in memory.
+            - disk_hits: Values found on disk.
+            - misses: Values not found.
+            - evictions: Values removed from memory to keep max_entries.
+            - expirations: Values removed because they were expired.
+            - size: Values in memory.
+        """
+        
+        with self._lock:
+            result = dict(self._stats)
+            result['size'] = len(self._entries)
+            
+        return result
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _set_memory_entry(self, key, entry):
+        
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+            
+    def _get_file_name(self, key):
+        
+        return os.path.join(self._path, '{}.json'.format(hashlib.sha1(key.encode('utf-8')).hexdigest()))
+        
+    def _get_disk_entry(self, key, now):
+        
+        if not self._path:
+            return (None, False)
+            
+        file_name = self._get_file_name(key)
+        try:
+            with open(file_name, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return (None, False)
+            
+        if data['key'] != key:
+            return (None, False)
+            
+        if data['expires'] <= now:
+            self._remove_file(file_name)
+            return (None, True)
+            
+        return ((data['expires'], data['value']), False)
+        
+    def _set_disk_entry(self, key, entry):
+        
+        if not self._path:
+            return
+            
+        # Write in a temporary file and rename it, so the other processes never read a partial file
+        try:
+            fd, temp_name = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+        except OSError:
+            return
+            
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'expires': entry[0], 'value': entry[1]}, f)
+            os.replace(temp_name, self._get_file_name(key))
+        except OSError:
+            self._remove_file(temp_name)
+        except:
+            self._remove_file(temp_name)
+            raise
+
+    def _remove_file(self, file_name):
+        
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
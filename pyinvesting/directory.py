@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from threading import Lock, RLock
+
+import bisect
+import difflib
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+class InstrumentDirectory:
+    
+    def __init__(self, path=None, max_age=7 * 86400, save_interval=60):
+        """
+        Class constructor 
+        
+        Local directory with every ticker returned by the search queries.
+        It answers the symbol resolution and prefix queries from an in-memory index.
+        
+        Parameters
+        ----------
+        path : str, optional
+            The JSON file where the directory is persisted.
+            If it exists, the directory is loaded from it, and the new tickers are saved every save_interval seconds,
+            when save is called and when it is closed.
+            If it is not specified, the directory is only kept in memory.
+        max_age : int
+            Seconds after which the instruments and search terms are considered stale,
+            and they are requested again to the server.
+        save_interval : float
+            Minimum seconds between the automatic saves of the new tickers.
+            If it is 0, the directory is saved every time new tickers are added.
+        """
+        
+        self._path = path
+        self._max_age = max_age
+        self._save_interval = save_interval
+        
+        self._instruments = {}
+        self._symbols = {}
+        self._terms = {}
+        
+        self._index = []
+        self._index_keys = []
+        self._index_dirty = False
+        
+        self._dirty = False
+        self._saved = time.time()
+        
+        self._lock = RLock()
+        self._save_lock = Lock()
+        
+        if path and os.path.exists(path):
+            self.load()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def add(self, tickers, search_term=None, limit=None):
+        """
+        Adds or updates the tickers returned by a search query.
+        
+        Parameters
+        ----------
+        tickers : dataframe
+            The tickers with the format returned by Search.tickers.
+        search_term : str, optional
+            The term used in the search query. 
+            If it is specified, the next queries with the same term are answered locally.
+        limit : int, optional
+            The limit used in the search query.
+        """
+        
+        now = time.time()
+        records = tickers.to_dict('records') if not tickers.empty else []
+        
+        with self._lock:
+            pair_ids = []
+            for record in records:
+                instrument = self._get_instrument(record, now)
+                self._add_instrument(instrument)
+                pair_ids.append(instrument['pair_id'])
+                
+            if search_term is not None:
+                self._terms[search_term.lower()] = (now, limit, pair_ids)
+                
+            self._dirty = True
+            
+        if now - self._saved >= self._save_interval:
+            self.save()
+
+    def get(self, pair_id):
+        """
+        Returns a dictionary with the instrument information or None if it is not found.
+        
+        Parameters
+        ----------
+        pair_id : int
+            The pair_id of the instrument.
+        """
+        
+        instrument = self._instruments.get(pair_id)
+        return dict(instrument) if instrument else None
+        
+    def resolve(self, symbol, exchange=None):
+        """
+        Returns the pair_id of a symbol or None if it is not found or it is stale.
+        
+        Parameters
+        ----------
+        symbol : str
+            The symbol of the instrument (case insensitive).
+        exchange : str, optional
+            The exchange of the instrument. It is required when the symbol is listed in several exchanges,
+            otherwise the first one found will be returned.
+        """
+        
+        oldest = time.time() - self._max_age
+        
+        for pair_id in self._symbols.get(symbol.lower(), ()):
+            instrument = self._instruments[pair_id]
+            if exchange and instrument['exchange'] != exchange:
+                continue
+            if instrument['updated'] >= oldest:
+                return pair_id
+            
+        return None
+
+    def lookup(self, prefix, limit=30):
+        """
+        Returns a dataframe with the instruments whose symbol or name starts with the prefix.
+        
+        Parameters
+        ----------
+        prefix : str
+            The prefix to be searched (case insensitive).
+        limit : int
+            Maximum results count that will be retrieved.
+        """
+        
+        prefix = prefix.lower()
+        result = []
+        
+        with self._lock:
+            self._build_index()
+            
+            position = bisect.bisect_left(self._index_keys, prefix)
+            while position < len(self._index) and len(result) < limit:
+                key, pair_id = self._index[position]
+                if not key.startswith(prefix):
+                    break
+                if pair_id not in result:
+                    result.append(pair_id)
+                position += 1
+                
+        return self._get_tickers_frame(result)
+
+    def fuzzy(self, term, limit=10, cutoff=0.6):
+        """
+        Returns a dataframe with the instruments whose symbol or name is similar to the term.
+        
+        Parameters
+        ----------
+        term : str
+            The term to be searched (case insensitive).
+        limit : int
+            Maximum results count that will be retrieved.
+        cutoff : float
+            Minimum similarity (between 0 and 1) of the results.
+        """
+        
+        result = []
+        
+        with self._lock:
+            self._build_index()
+            matches = difflib.get_close_matches(term.lower(), self._index_keys, n=limit * 2, cutoff=cutoff)
+            
+            for key in matches:
+                position = bisect.bisect_left(self._index_keys, key)
+                while position < len(self._index) and self._index_keys[position] == key:
+                    pair_id = self._index[position][1]
+                    if pair_id not in result:
+                        result.append(pair_id)
+                    position += 1
+                    
+        return self._get_tickers_frame(result[:limit])
+
+    def get_term(self, search_term, limit=30):
+        """
+        Returns a dataframe with the tickers returned by a previous search query,
+        or None if the term was not searched or it is stale.
+        
+        Parameters
+        ----------
+        search_term : str
+            The term used in the search query (case insensitive).
+        limit : int
+            Maximum results count that will be retrieved.
+        """
+        
+        entry = self._terms.get(search_term.lower())
+        if not entry:
+            return None
+            
+        updated, term_limit, pair_ids = entry
+        if updated < time.time() - self._max_age:
+            return None
+            
+        # A query with a higher limit could return more tickers
+        if term_limit is not None and limit > term_limit and len(pair_ids) >= term_limit:
+            return None
+            
+        return self._get_tickers_frame(pair_ids[:limit])
+        
+    def load(self):
+        """
+        Loads the directory from its file.
+        """
+        
+        with open(self._path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            
+        with self._lock:
+            for instrument in data.get('instruments', []):
+                self._add_instrument(instrument)
+                
+            for term, entry in data.get('terms', {}).items():
+                self._terms[term] = tuple(entry)
+                
+    def save(self):
+        """
+        Saves the tickers added since the previous save in the directory file.
+        """
+        
+        if not self._path:
+            return
+            
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                    
+                data = {
+                    'instruments': list(self._instruments.values()),
+                    'terms': dict(self._terms)
+                }
+                self._dirty = False
+                self._saved = time.time()
+                
+            # Write in a temporary file and rename it, so the other processes never read a partial file
+            directory = os.path.dirname(os.path.abspath(self._path))
+            fd, temp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(temp_name, self._path)
+            except:
+                self._dirty = True
+                os.remove(temp_name)
+                raise
+                
+    def close(self):
+        """
+        Saves the tickers not saved yet. It should be called before finishing the process.
+        """
+        
+        self.save()
+        
+    def __len__(self):
+        
+        return len(self._instruments)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_instrument(self, record, updated):
+        
+        instrument = {'pair_id': int(record['pair_id']), 'updated': updated}
+        for key in ['link', 'symbol', 'exchange', 'name', 'type']:
+            value = record.get(key)
+            instrument[key] = value if isinstance(value, str) else None
+            
+        return instrument
+        
+    def _add_instrument(self, instrument):
+        
+        pair_id = instrument['pair_id']
+        previous = self._instruments.get(pair_id)
+        if previous and previous['symbol'] and previous['symbol'] != instrument['symbol']:
+            self._symbols[previous['symbol'].lower()].remove(pair_id)
+            
+        self._instruments[pair_id] = instrument
+        
+        if instrument['symbol']:
+            pair_ids = self._symbols.setdefault(instrument['symbol'].lower(), [])
+            if pair_id not in pair_ids:
+                pair_ids.append(pair_id)
+            
+        self._index_dirty = True
+        
+    def _build_index(self):
+        
+        if not self._index_dirty:
+            return
+            
+        # Sorted (key, pair_id) entries, the symbols and every word of the names are indexed
+        index = set()
+        for pair_id, instrument in self._instruments.items():
+            if instrument['symbol']:
+                index.add((instrument['symbol'].lower(), pair_id))
+            if instrument['name']:
+                name = instrument['name'].lower()
+                index.add((name, pair_id))
+                for word in name.split()[1:]:
+                    index.add((word, pair_id))
+                    
+        self._index = sorted(index, key=lambda entry: (entry[0], str(entry[1])))
+        self._index_keys = [entry[0] for entry in self._index]
+        self._index_dirty = False
+        
+    def _get_tickers_frame(self, pair_ids):
+        
+        cols = ['pair_id', 'link', 'symbol', 'exchange', 'name', 'type']
+        if not pair_ids:
+            return pd.DataFrame()
+            
+        return pd.DataFrame([self._instruments[pair_id] for pair_id in pair_ids if pair_id in self._instruments], columns=cols)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(content):
+    """
+    Parses a JSON document.
+    
+    The orjson package is used when it is installed, otherwise the standard json module is used.
+    
+    Parameters
+    ----------
+    content : bytes or str
+        The JSON document.
+    """
+    
+    if orjson:
+        return orjson.loads(content)
+        
+    return json.loads(content)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from threading import Thread, Event, Lock
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Columns of the ring buffers, the datetime is the unix timestamp of the bar start
+_BAR_FIELDS = ('datetime', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+class BarBuilder:
+    
+    def __init__(self, intervals=(60,), capacity=1000, on_bar=None, on_error=None, close_delay=2.0):
+        """
+        Class constructor 
+        
+        Builds the OHLC bars of every pair_id from the quotes received. 
+        It is attached to an Online instance with Online.attach, and every quote updates the current bars in O(1).
+        The completed bars are kept in fixed-size ring buffers, with the columns returned by History.get_chart_data.
+        
+        Ex. 
+            bars = BarBuilder(intervals=[1, 60], on_bar=on_bar)
+            online.attach(bars)
+        
+        Parameters
+        ----------
+        intervals : list
+            The seconds represented by each bar. The bars are built for every interval.
+        capacity : int
+            Number of completed bars kept for every pair_id and interval. The oldest bars are overwritten.
+        on_bar : function(pair_id, interval, bar), optional
+            Callable object which is called with a one row dataframe every time a bar is completed.
+        on_error : function(exception), optional
+            Callable object which is called when on_bar raises an exception.
+        close_delay : float, optional
+            Seconds after the end of an interval when its bars are completed, even if no new quotes were received.
+            The time is measured with the timestamps of the quotes (the newest one received plus the seconds elapsed 
+            since it was received), so a local clock ahead of the server does not complete the bars early.
+            The quotes of a completed bar received later are discarded.
+            If it is not specified, the bars are completed when the first quote of the next interval is received.
+        """
+        
+        self._intervals = tuple(int(interval) for interval in intervals)
+        self._capacity = max(int(capacity), 1)
+        self._on_bar = on_bar
+        self._on_error = on_error
+        self._close_delay = close_delay
+        
+        # (pair_id, interval) -> [start, open, high, low, close, ticks, turnover_start, turnover_last]
+        self._bars = {}
+        # (pair_id, interval) -> [array, count]
+        self._rings = {}
+        self._turnovers = {}
+        self._late = 0
+        
+        # Newest quote timestamp and the monotonic time it was received (the server clock)
+        self._last_timestamp = None
+        self._last_received = None
+        
+        self._lock = Lock()
+        
+        self._thread = None
+        self._thread_event = Event()
+        if close_delay is not None:
+            self._thread = Thread(target=self._closer)
+            self._thread.daemon = True
+            self._thread.start()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def on_quote(self, quote):
+        """
+        Updates the current bars of the quote pair_id. It is called by Online for every quote received.
+        The quotes without last price are ignored.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote received.
+        """
+        
+        price = quote.last
+        if price != price: # It is NaN
+            return
+            
+        timestamp = quote.timestamp if quote.timestamp == quote.timestamp else time.time()
+        turnover = quote.turnover
+        pair_id = quote.pair_id
+        closed = []
+        
+        with self._lock:
+            if self._last_timestamp is None or timestamp > self._last_timestamp:
+                self._last_timestamp = timestamp
+                self._last_received = time.monotonic()
+                
+            for interval in self._intervals:
+                key = (pair_id, interval)
+                start = timestamp - timestamp % interval
+                bar = self._bars.get(key)
+                
+                if bar is None or start > bar[0]:
+                    if bar is not None:
+                        closed.append(self._close_bar(key, bar))
+                    elif self._is_late(key, start):
+                        self._late += 1
+                        continue
+                    turnover_start = self._turnovers.get(key, turnover)
+                    self._bars[key] = [start, price, price, price, price, 1, turnover_start, turnover]
+                elif start < bar[0]:
+                    self._late += 1
+                else:
+                    if price > bar[2]:
+                        bar[2] = price
+                    elif price < bar[3]:
+                        bar[3] = price
+                    bar[4] = price
+                    bar[5] += 1
+                    if turnover == turnover:
+                        bar[7] = turnover
+                        if bar[6] != bar[6]:
+                            bar[6] = turnover
+                        
+        self._notify(closed)
+        
+    def get_bars(self, pair_id, interval=None, count=None, include_current=False, ticks=False):
+        """
+        Returns a dataframe with the completed bars of a pair_id, from the oldest to the newest.
+        The columns are the same as History.get_chart_data (datetime, open, high, low, close, volume).
+        
+        Parameters
+        ----------
+        pair_id : int
+            The pair_id that identify the asset.
+        interval : int, optional
+            The seconds represented by each bar. If it is not specified, the first interval is used.
+        count : int, optional
+            Maximum number of bars retrieved (the newest ones). If it is not specified, all the bars kept are retrieved.
+        include_current : bool
+            If it is True, the bar of the current interval (not completed yet) is included.
+        ticks : bool
+            If it is True, a ticks column with the number of quotes of every bar is included.
+        """
+        
+        key = (pair_id, int(interval) if interval else self._intervals[0])
+        
+        with self._lock:
+            values = self._get_ring_values(key)
+            bar = self._bars.get(key)
+            if include_current and bar is not None:
+                values = np.vstack((values, self._get_bar_values(bar)))
+                
+        if count:
+            values = values[-count:]
+            
+        return self._get_bars_frame(values, ticks)
+        
+    def flush(self, timestamp=None):
+        """
+        Completes the bars whose interval ended before the timestamp.
+        
+        Parameters
+        ----------
+        timestamp : float, optional
+            The unix timestamp. If it is not specified, all the current bars are completed.
+        """
+        
+        closed = []
+        with self._lock:
+            for key, bar in list(self._bars.items()):
+                if timestamp is None or bar[0] + key[1] <= timestamp:
+                    closed.append(self._close_bar(key, bar))
+                    del self._bars[key]
+                    
+        self._notify(closed)
+        
+    def close(self):
+        """
+        Stops the thread that completes the bars after close_delay.
+        """
+        
+        if self._thread:
+            self._thread_event.set()
+            self._thread.join()
+            self._thread = None
+            
+    def stats(self):
+        """
+        Returns a dictionary with the number of current bars (bars key) and the late quotes discarded (late key).
+        """
+        
+        with self._lock:
+            return {'bars': len(self._bars), 'late': self._late}
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _close_bar(self, key, bar):
+        
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = [np.empty((self._capacity, len(_BAR_FIELDS)), dtype=np.float64), 0]
+            
+        values = self._get_bar_values(bar)
+        ring[0][ring[1] % self._capacity] = values
+        ring[1] += 1
+        
+        if bar[7] == bar[7]:
+            self._turnovers[key] = bar[7]
+            
+        return key, values
+        
+    def _is_late(self, key, start):
+        
+        ring = self._rings.get(key)
+        return ring is not None and start <= ring[0][(ring[1] - 1) % self._capacity, 0]
+        
+    def _get_bar_values(self, bar):
+        
+        # The turnover is accumulated during the day, so a lower value is a new session
+        volume = bar[7] - bar[6] if bar[7] >= bar[6] else bar[7]
+        return np.array([bar[0], bar[1], bar[2], bar[3], bar[4], volume, bar[5]], dtype=np.float64)
+        
+    def _get_ring_values(self, key):
+        
+        ring = self._rings.get(key)
+        if ring is None:
+            return np.empty((0, len(_BAR_FIELDS)), dtype=np.float64)
+            
+        array, count = ring
+        if count <= self._capacity:
+            return array[:count].copy()
+            
+        position = count % self._capacity
+        return np.concatenate((array[position:], array[:position]))
+        
+    def _get_bars_frame(self, values, ticks):
+        
+        df = pd.DataFrame({
+            'datetime': (values[:, 0].astype(np.int64) * 1000000000).view('datetime64[ns]'),
+            'open': values[:, 1],
+            'high': values[:, 2],
+            'low': values[:, 3],
+            'close': values[:, 4],
+            'volume': values[:, 5]
+        })
+        
+        if ticks:
+            df['ticks'] = values[:, 6].astype(np.int64)
+            
+        return df
+        
+    def _notify(self, closed):
+        
+        if not self._on_bar:
+            return
+            
+        for key, values in closed:
+            try:
+                self._on_bar(key[0], key[1], self._get_bars_frame(values.reshape(1, -1), False))
+            except Exception as ex:
+                if self._on_error:
+                    self._on_error(ex)
+                    
+    def _closer(self):
+        
+        while not self._thread_event.wait(min(min(self._intervals), 1)):
+            self.flush(self._get_server_time() - self._close_delay)
+            
+    def _get_server_time(self):
+        
+        # The wall clock is only used until the first quote is received
+        with self._lock:
+            if self._last_timestamp is None:
+                return time.time()
+            return self._last_timestamp + time.monotonic() - self._last_received
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import OnlineParser, QUOTE_DTYPE
+
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+class QuoteBatcher:
+    
+    def __init__(self, on_batch, interval_ms=50, max_size=1000, on_error=None):
+        """
+        Class constructor 
+        
+        Collects the quotes in preallocated column buffers and delivers them in one dataframe 
+        every interval or when the buffer is full.
+        
+        Parameters
+        ----------
+        on_batch : function(quotes)
+            Callable object which is called with the dataframe of every batch.
+            It is always called from one thread at a time, and the batches are delivered in order.
+        interval_ms : int
+            Milliseconds between the batches.
+        max_size : int
+            Maximum quotes in a batch. When the buffer is full, it is delivered before the interval finishes.
+        on_error : function(exception), optional
+            Callable object which is called when on_batch raises an exception in the flusher thread.
+        """
+        
+        self._on_batch = on_batch
+        self._interval = interval_ms / 1000.0
+        self._max_size = max(int(max_size), 1)
+        self._on_error = on_error
+        self._parser = OnlineParser()
+        
+        # Two sets of buffers, one is filled while the other one is delivered
+        self._buffers = [self._get_buffers(), self._get_buffers()]
+        self._size = 0
+        
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        
+        self._thread = None
+        self._thread_event = None
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def start(self):
+        """
+        Starts the thread that delivers the batches every interval.
+        """
+        
+        if self._thread:
+            return
+            
+        self._thread_event = Event()
+        self._thread = Thread(target=self._flusher)
+        self._thread.daemon = True
+        self._thread.start()
+        
+    def stop(self):
+        """
+        Stops the flusher thread and delivers the pending quotes.
+        """
+        
+        if self._thread:
+            self._thread_event.set()
+            self._thread.join()
+            self._thread = None
+            
+        self.flush()
+            
+    def add(self, quote):
+        """
+        Adds a quote to the current batch.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote to be added.
+        """
+        
+        while True:
+            with self._lock:
+                if self._size < self._max_size:
+                    buffers = self._buffers[0]
+                    position = self._size
+                    buffers['ticker'][position] = quote.ticker
+                    for field in QUOTE_DTYPE.names:
+                        buffers[field][position] = getattr(quote, field)
+                    self._size += 1
+                    full = self._size == self._max_size
+                    break
+                    
+            # Another thread filled the buffer and it is still being delivered
+            self.flush()
+            
+        if full:
+            self.flush()
+            
+    def add_many(self, quotes):
+        """
+        Adds several quotes to the current batch (Ex. the quotes of a websocket frame).
+        
+        Parameters
+        ----------
+        quotes : list
+            The QuoteRecord objects to be added.
+        """
+        
+        for quote in quotes:
+            self.add(quote)
+            
+    def flush(self):
+        """
+        Delivers the quotes of the current batch.
+        """
+        
+        with self._flush_lock:
+            with self._lock:
+                size = self._size
+                if size == 0:
+                    return
+                buffers = self._buffers[0]
+                self._buffers.reverse()
+                self._size = 0
+                
+            # The frame is built with copies because the buffers are reused by the next batches
+            columns = {field: buffer[:size].copy() for field, buffer in buffers.items()}
+            self._on_batch(self._parser.get_quotes_frame_from_columns(columns))
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_buffers(self):
+        
+        buffers = {'ticker': np.empty(self._max_size, dtype=object)}
+        for field, dtype in QUOTE_DTYPE.fields.items():
+            buffers[field] = np.empty(self._max_size, dtype=dtype[0])
+            
+        return buffers
+        
+    def _flusher(self):
+        
+        while not self._thread_event.wait(self._interval):
+            try:
+                self.flush()
+            except Exception as ex:
+                if self._on_error:
+                    self._on_error(ex)
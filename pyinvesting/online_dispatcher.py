@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import QUOTE_FIELDS
+
+from collections import deque
+from threading import Thread, Condition
+
+import time
+
+# Overflow policies of the dispatch queue
+DISPATCH_POLICIES = ('block', 'drop_oldest', 'conflate')
+
+class QuoteDispatcher:
+    
+    def __init__(self, on_quotes, max_size=10000, policy='block', on_error=None, workers=1):
+        """
+        Class constructor 
+        
+        Bounded queue between the websocket thread and the callbacks.
+        The quotes are delivered in dedicated threads, so a slow callback does not stop the websocket reads.
+        
+        Parameters
+        ----------
+        on_quotes : function(quotes)
+            Callable object which is called in a dispatcher thread with a list of QuoteRecord objects
+            (all the quotes waiting in the queue of the worker, in order).
+        max_size : int
+            Maximum quotes waiting in the queue (it is split between the workers).
+        policy : str
+            What is done when the queue is full. Valid values:
+                - block: The websocket thread waits until there is space in the queue.
+                - drop_oldest: The oldest quote in the queue is discarded.
+                - conflate: The queue keeps only the latest state of every pair_id (a new quote is merged
+                  with the one waiting for the same pair_id). If the queue is full of different pair_ids, 
+                  the oldest one is discarded.
+        on_error : function(exception), optional
+            Callable object which is called when on_quote raises an exception.
+        workers : int
+            Number of dispatcher threads. Every pair_id is always delivered by the same worker,
+            so the quotes of a pair_id keep their order, and the different pair_ids are delivered in parallel.
+        """
+        
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError('Invalid dispatch policy: {}'.format(policy))
+            
+        workers = max(int(workers), 1)
+        lane_size = -(-max(int(max_size), 1) // workers)
+        
+        self._lanes = [_DispatchLane(on_quotes, lane_size, policy, on_error) for _ in range(workers)]
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def start(self):
+        """
+        Starts the dispatcher threads.
+        """
+        
+        for lane in self._lanes:
+            lane.start()
+        
+    def stop(self, timeout=None):
+        """
+        Stops the dispatcher threads after delivering the quotes waiting in the queue.
+        
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum seconds to wait for the pending quotes of every worker to be delivered.
+        """
+        
+        for lane in self._lanes:
+            lane.stop(timeout)
+            
+    def put(self, quote):
+        """
+        Adds a quote to the queue of its worker applying the overflow policy.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote to be delivered.
+        """
+        
+        self._lanes[hash(quote.pair_id) % len(self._lanes)].put_many([quote])
+        
+    def put_many(self, quotes):
+        """
+        Adds several quotes (Ex. the quotes of a websocket frame) to the queues of their workers applying the overflow policy.
+        
+        Parameters
+        ----------
+        quotes : list
+            The QuoteRecord objects to be delivered.
+        """
+        
+        if len(self._lanes) == 1:
+            self._lanes[0].put_many(quotes)
+            return
+            
+        lanes = {}
+        for quote in quotes:
+            lanes.setdefault(hash(quote.pair_id) % len(self._lanes), []).append(quote)
+            
+        for lane, lane_quotes in lanes.items():
+            self._lanes[lane].put_many(lane_quotes)
+            
+    def stats(self):
+        """
+        Returns a dictionary with the usage of the queue.
+        
+        The keys are:
+            - depth: Quotes waiting in the queue.
+            - max_depth: Maximum quotes that were waiting in the queue of a worker.
+            - delivered: Quotes delivered to the callback.
+            - dropped: Quotes discarded because the queue was full.
+            - conflated: Quotes merged with a quote of the same pair_id waiting in the queue.
+            - workers: A list with the same stats of every worker, and its utilization 
+              (busy time / running time, between 0 and 1).
+        """
+        
+        workers = [lane.stats() for lane in self._lanes]
+        
+        result = {key: sum(worker[key] for worker in workers) for key in ['depth', 'delivered', 'dropped', 'conflated']}
+        result['max_depth'] = max(worker['max_depth'] for worker in workers)
+        result['workers'] = workers
+        
+        return result
+
+class _DispatchLane:
+    
+    def __init__(self, on_quotes, max_size, policy, on_error):
+        
+        self._on_quotes = on_quotes
+        self._max_size = max_size
+        self._policy = policy
+        self._on_error = on_error
+        
+        # The conflated queue is a dictionary by pair_id (it keeps the insertion order)
+        self._queue = {} if policy == 'conflate' else deque()
+        self._condition = Condition()
+        self._stats = {'delivered': 0, 'dropped': 0, 'conflated': 0, 'max_depth': 0}
+        
+        self._busy_time = 0.0
+        self._started_at = None
+        
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        
+        with self._condition:
+            if self._thread:
+                return
+            self._running = True
+            
+        self._started_at = time.monotonic()
+        self._thread = Thread(target=self._dispatcher)
+        self._thread.daemon = True
+        self._thread.start()
+        
+    def stop(self, timeout):
+        
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def put_many(self, quotes):
+        
+        with self._condition:
+            for quote in quotes:
+                if self._policy == 'conflate':
+                    self._put_conflated(quote)
+                else:
+                    if len(self._queue) >= self._max_size:
+                        if self._policy == 'block':
+                            self._condition.notify_all()
+                            while len(self._queue) >= self._max_size and self._running:
+                                self._condition.wait()
+                        else:
+                            self._queue.popleft()
+                            self._stats['dropped'] += 1
+                    self._queue.append(quote)
+                    
+            self._stats['max_depth'] = max(self._stats['max_depth'], len(self._queue))
+            self._condition.notify_all()
+            
+    def stats(self):
+        
+        with self._condition:
+            result = dict(self._stats)
+            result['depth'] = len(self._queue)
+            
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        result['utilization'] = min(self._busy_time / elapsed, 1.0) if elapsed > 0 else 0.0
+        
+        return result
+
+    def _put_conflated(self, quote):
+        
+        previous = self._queue.get(quote.pair_id)
+        if previous is not None:
+            # The values not received in the new quote keep the previous one
+            for field in QUOTE_FIELDS[1:]:
+                value = getattr(quote, field)
+                if value != value:
+                    setattr(quote, field, getattr(previous, field))
+            self._stats['conflated'] += 1
+        elif len(self._queue) >= self._max_size:
+            del self._queue[next(iter(self._queue))]
+            self._stats['dropped'] += 1
+            
+        # Replacing the value keeps the position of the pair_id in the queue
+        self._queue[quote.pair_id] = quote
+        
+    def _get(self):
+        
+        with self._condition:
+            while not self._queue and self._running:
+                self._condition.wait()
+                
+            if not self._queue:
+                return None
+                
+            # All the quotes waiting are delivered in the same call
+            quotes = list(self._queue.values()) if self._policy == 'conflate' else list(self._queue)
+            self._queue.clear()
+                
+            self._condition.notify_all()
+            return quotes
+            
+    def _dispatcher(self):
+        
+        while True:
+            quotes = self._get()
+            if quotes is None:
+                break
+                
+            start = time.monotonic()
+            try:
+                self._on_quotes(quotes)
+            except Exception as ex:
+                if self._on_error:
+                    self._on_error(ex)
+                    
+            self._busy_time += time.monotonic() - start
+            self._stats['delivered'] += len(quotes)
@@ -0,0 +1,607 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import QUOTE_DTYPE
+
+from collections import deque
+from threading import Thread, Lock
+
+import os
+import selectors
+import socket
+import stat
+import struct
+
+import numpy as np
+
+# Overflow policies of the client queues
+GATEWAY_POLICIES = ('drop_oldest', 'conflate', 'disconnect')
+
+# Every quote is sent with the QUOTE_DTYPE layout (pair_id int64 and 9 float64, little endian)
+_QUOTE_STRUCT = struct.Struct('<q9d')
+
+# Every command is the command type (uint8), the pair_ids count (uint32) and the pair_ids (int64)
+_COMMAND_STRUCT = struct.Struct('<BI')
+_COMMAND_SUBSCRIBE = 1
+_COMMAND_UNSUBSCRIBE = 2
+
+class QuoteGateway:
+    
+    def __init__(self, online, address=('127.0.0.1', 9800), max_queue_size=10000, policy='drop_oldest', 
+        max_command_size=1048576):
+        """
+        Class constructor 
+        
+        Serves the quotes of one Online instance to many local clients over a TCP or UNIX socket.
+        The clients subscribe to the pair_ids they need (see QuoteGatewayClient), and the gateway keeps 
+        one upstream subscription for every pair_id requested by any client.
+        
+        Every quote is encoded once with a fixed-width binary format (QUOTE_DTYPE records) and queued 
+        for every client subscribed to its pair_id. The queues are sent by one I/O thread, 
+        so a slow client does not delay the others or the websocket reads.
+        
+        Ex. 
+            gateway = QuoteGateway(online, address='/tmp/pyinvesting.sock')
+            gateway.start()
+        
+        Parameters
+        ----------
+        online : Online
+            The connected Online instance used to receive the quotes.
+        address : tuple or str
+            The (host, port) of the TCP socket, or the path of the UNIX socket.
+        max_queue_size : int
+            Maximum quotes waiting to be sent to every client.
+        policy : str
+            What is done when the queue of a client is full. Valid values:
+                - drop_oldest: The oldest quote in the queue is discarded.
+                - conflate: The queue keeps only the latest state of every pair_id (a new quote is merged
+                  with the one waiting for the same pair_id). If the queue is full of different pair_ids, 
+                  the oldest one is discarded.
+                - disconnect: The client is disconnected.
+        max_command_size : int
+            Maximum bytes of the commands received from every client and not processed yet.
+            The clients that send larger commands are disconnected, so they cannot grow the gateway memory.
+        """
+        
+        if policy not in GATEWAY_POLICIES:
+            raise ValueError('Invalid gateway policy: {}'.format(policy))
+            
+        self._online = online
+        self._address = address
+        self._max_queue_size = max(int(max_queue_size), 1)
+        self._policy = policy
+        self._max_command_size = max(int(max_command_size), _COMMAND_STRUCT.size)
+        
+        self._clients = set()
+        self._subscribers = {}
+        self._refs = {}
+        self._owned = set()
+        self._ready = set()
+        self._stats = {'connections': 0, 'disconnected': 0, 'rejected': 0}
+        
+        self._lock = Lock()
+        self._selector = None
+        self._server = None
+        self._wakeup = None
+        self._wakeup_pending = False
+        self._thread = None
+        self._running = False
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def start(self):
+        """
+        Opens the socket and starts serving the clients.
+        """
+        
+        if self._thread:
+            return
+            
+        self._server = self._get_server_socket()
+        self._wakeup = socket.socketpair()
+        for sock in self._wakeup:
+            sock.setblocking(False)
+            
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ, 'server')
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ, 'wakeup')
+        
+        self._running = True
+        self._online.attach(self)
+        
+        self._thread = Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        
+    def stop(self):
+        """
+        Disconnects all the clients, unsubscribes the pair_ids subscribed by the gateway and closes the socket.
+        """
+        
+        if not self._thread:
+            return
+            
+        self._online.detach(self)
+        self._running = False
+        self._wake()
+        self._thread.join()
+        self._thread = None
+        
+        for client in list(self._clients):
+            self._close_client(client)
+            
+        self._selector.close()
+        self._server.close()
+        for sock in self._wakeup:
+            sock.close()
+            
+        if isinstance(self._address, str) and os.path.exists(self._address):
+            os.unlink(self._address)
+            
+    def on_quote(self, quote):
+        """
+        Queues a quote for the clients subscribed to its pair_id. It is called by Online for every quote received.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote received.
+        """
+        
+        with self._lock:
+            clients = self._subscribers.get(quote.pair_id)
+            if not clients:
+                return
+                
+            values = (quote.pair_id, quote.bid, quote.ask, quote.last, quote.high, quote.low, 
+                quote.change, quote.turnover, quote.previous_close, quote.timestamp)
+            data = _QUOTE_STRUCT.pack(*values)
+            
+            for client in clients:
+                client.put(quote.pair_id, values, data)
+                self._ready.add(client)
+                
+        self._wake()
+        
+    def stats(self):
+        """
+        Returns a dictionary with the state of the gateway.
+        
+        The keys are:
+            - connections: Clients connected since the gateway was started.
+            - disconnected: Clients disconnected because their queue was full (disconnect policy).
+            - rejected: Clients disconnected because they sent an invalid command or one larger than max_command_size.
+            - subscriptions: Upstream pair_ids subscribed for the clients.
+            - clients: A list with the stats of every client connected (address, pairs, depth, sent, dropped, conflated).
+        """
+        
+        with self._lock:
+            result = dict(self._stats)
+            result['subscriptions'] = len(self._refs)
+            result['clients'] = [client.stats() for client in self._clients]
+            
+        return result
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_server_socket(self):
+        
+        if isinstance(self._address, str):
+            # Remove the socket file left by a previous process
+            if os.path.exists(self._address) and stat.S_ISSOCK(os.stat(self._address).st_mode):
+                os.unlink(self._address)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            server = socket.socket(socket.AF_INET6 if ':' in self._address[0] else socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            
+        server.bind(self._address)
+        server.listen(128)
+        server.setblocking(False)
+        
+        return server
+        
+    def _wake(self):
+        
+        with self._lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+            
+        try:
+            self._wakeup[1].send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+            
+    def _serve(self):
+        
+        while self._running:
+            for key, mask in self._selector.select(timeout=1):
+                if key.data == 'server':
+                    self._accept_client()
+                elif key.data == 'wakeup':
+                    try:
+                        while self._wakeup[0].recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    with self._lock:
+                        self._wakeup_pending = False
+                else:
+                    if mask & selectors.EVENT_READ:
+                        self._read_client(key.data)
+                    if mask & selectors.EVENT_WRITE:
+                        self._write_client(key.data)
+                        
+            with self._lock:
+                ready = self._ready
+                self._ready = set()
+                
+            for client in ready:
+                if client in self._clients:
+                    self._write_client(client)
+                    
+    def _accept_client(self):
+        
+        try:
+            sock, address = self._server.accept()
+        except (BlockingIOError, OSError):
+            return
+            
+        sock.setblocking(False)
+        if sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+        client = _GatewayClient(sock, address, self._max_queue_size, self._policy, self._max_command_size)
+        with self._lock:
+            self._clients.add(client)
+            self._stats['connections'] += 1
+            
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        
+    def _read_client(self, client):
+        
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+            
+        if not data:
+            self._close_client(client)
+            return
+            
+        try:
+            for command, pair_ids in client.get_commands(data):
+                if command == _COMMAND_SUBSCRIBE:
+                    self._subscribe(client, pair_ids)
+                elif command == _COMMAND_UNSUBSCRIBE:
+                    self._unsubscribe(client, pair_ids)
+                else:
+                    raise ValueError('Invalid gateway command: {}'.format(command))
+        except Exception:
+            with self._lock:
+                self._stats['rejected'] += 1
+            self._close_client(client)
+            
+    def _write_client(self, client):
+        
+        if client.overflowed:
+            with self._lock:
+                self._stats['disconnected'] += 1
+            self._close_client(client)
+            return
+            
+        # Send until the queue is empty or the socket buffer is full
+        try:
+            while True:
+                with self._lock:
+                    client.fill_pending()
+                if not client.pending:
+                    break
+                client.sent(client.sock.send(client.pending))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._close_client(client)
+            return
+            
+        # Wait until the socket can be written if the data was not sent completely
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.pending else 0)
+        if events != client.events:
+            client.events = events
+            self._selector.modify(client.sock, events, client)
+            
+    def _close_client(self, client):
+        
+        with self._lock:
+            if client not in self._clients:
+                return
+            self._clients.discard(client)
+            self._ready.discard(client)
+            
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+        
+        self._unsubscribe(client, list(client.pairs))
+        
+    def _subscribe(self, client, pair_ids):
+        
+        added = []
+        with self._lock:
+            for pair_id in pair_ids:
+                if pair_id in client.pairs:
+                    continue
+                client.pairs.add(pair_id)
+                self._subscribers.setdefault(pair_id, set()).add(client)
+                self._refs[pair_id] = self._refs.get(pair_id, 0) + 1
+                if self._refs[pair_id] == 1:
+                    added.append(pair_id)
+                    
+        # The pair_ids already subscribed in Online (not by the gateway) are never unsubscribed
+        subscriptions = self._online.subscriptions()
+        added = [pair_id for pair_id in added if pair_id not in subscriptions]
+        if added:
+            self._owned.update(added)
+            self._online.subscribe_many(added)
+            
+    def _unsubscribe(self, client, pair_ids):
+        
+        removed = []
+        with self._lock:
+            for pair_id in pair_ids:
+                if pair_id not in client.pairs:
+                    continue
+                client.pairs.discard(pair_id)
+                client.remove(pair_id)
+                
+                clients = self._subscribers[pair_id]
+                clients.discard(client)
+                if not clients:
+                    del self._subscribers[pair_id]
+                    
+                self._refs[pair_id] -= 1
+                if self._refs[pair_id] == 0:
+                    del self._refs[pair_id]
+                    removed.append(pair_id)
+                    
+        removed = [pair_id for pair_id in removed if pair_id in self._owned]
+        if removed:
+            self._owned.difference_update(removed)
+            self._online.unsubscribe_many(removed)
+
+class QuoteGatewayClient:
+    
+    def __init__(self, address=('127.0.0.1', 9800), timeout=10):
+        """
+        Class constructor 
+        
+        Receives the quotes served by a QuoteGateway.
+        
+        Ex. 
+            client = QuoteGatewayClient('/tmp/pyinvesting.sock')
+            client.connect()
+            client.subscribe_many([8873, 8839])
+            quotes = client.read(timeout=1)
+        
+        Parameters
+        ----------
+        address : tuple or str
+            The (host, port) of the TCP socket, or the path of the UNIX socket of the gateway.
+        timeout : float
+            Seconds to wait for the connection.
+        """
+        
+        self._address = address
+        self._timeout = timeout
+        self._sock = None
+        self._buffer = b''
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def connect(self):
+        """
+        Connects to the gateway.
+        """
+        
+        if isinstance(self._address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self._timeout)
+            self._sock.connect(self._address)
+        else:
+            self._sock = socket.create_connection(self._address, self._timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+    def subscribe_many(self, pair_ids):
+        """
+        Subscribe to several assets to receive their quotes.
+        
+        Parameters
+        ----------
+        pair_ids : list
+            The pair_ids that identify the assets.
+        """
+        
+        self._send_command(_COMMAND_SUBSCRIBE, pair_ids)
+        
+    def unsubscribe_many(self, pair_ids):
+        """
+        Unsubscribe from several assets to stop receiving their quotes.
+        
+        Parameters
+        ----------
+        pair_ids : list
+            The pair_ids that identify the assets.
+        """
+        
+        self._send_command(_COMMAND_UNSUBSCRIBE, pair_ids)
+        
+    def read(self, timeout=None):
+        """
+        Returns a NumPy structured array (QUOTE_DTYPE) with the quotes received since the previous read,
+        in the order received. The missing values of the partial quotes are NaN.
+        If the gateway closed the connection, a ConnectionError is raised.
+        
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for quotes. If it is not specified, it waits until a quote is received.
+        """
+        
+        self._sock.settimeout(timeout)
+        try:
+            data = self._sock.recv(1048576)
+        except socket.timeout:
+            data = None
+            
+        if data == b'':
+            raise ConnectionError('The gateway closed the connection')
+            
+        if data:
+            self._buffer += data
+            
+        size = len(self._buffer) - len(self._buffer) % QUOTE_DTYPE.itemsize
+        result = np.frombuffer(self._buffer[:size], dtype=QUOTE_DTYPE)
+        self._buffer = self._buffer[size:]
+        
+        return result
+        
+    def close(self):
+        """
+        Closes the connection with the gateway.
+        """
+        
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _send_command(self, command, pair_ids):
+        
+        pair_ids = [int(pair_id) for pair_id in pair_ids]
+        self._sock.settimeout(self._timeout)
+        self._sock.sendall(_COMMAND_STRUCT.pack(command, len(pair_ids)) + struct.pack('<{}q'.format(len(pair_ids)), *pair_ids))
+
+class _GatewayClient:
+    
+    def __init__(self, sock, address, max_size, policy, max_command_size):
+        
+        self.sock = sock
+        self.address = address if address else sock.getsockname()
+        self.pairs = set()
+        self.events = selectors.EVENT_READ
+        self.pending = b''
+        self.overflowed = False
+        
+        self._max_size = max_size
+        self._policy = policy
+        self._max_command_size = max_command_size
+        
+        # The conflated queue is a dictionary by pair_id (it keeps the insertion order)
+        self._queue = {} if policy == 'conflate' else deque()
+        self._commands = b''
+        self._stats = {'sent': 0, 'dropped': 0, 'conflated': 0}
+        
+    def put(self, pair_id, values, data):
+        
+        if self._policy == 'conflate':
+            previous = self._queue.get(pair_id)
+            if previous is not None:
+                # The values not received in the new quote keep the previous one
+                values = tuple(value if value == value else old for value, old in zip(values, previous))
+                self._stats['conflated'] += 1
+            elif len(self._queue) >= self._max_size:
+                del self._queue[next(iter(self._queue))]
+                self._stats['dropped'] += 1
+                
+            # Replacing the value keeps the position of the pair_id in the queue
+            self._queue[pair_id] = values
+        else:
+            if len(self._queue) >= self._max_size:
+                if self._policy == 'disconnect':
+                    self.overflowed = True
+                    return
+                self._queue.popleft()
+                self._stats['dropped'] += 1
+            self._queue.append((pair_id, data))
+            
+    def remove(self, pair_id):
+        
+        if self._policy == 'conflate':
+            self._queue.pop(pair_id, None)
+        else:
+            self._queue = deque(item for item in self._queue if item[0] != pair_id)
+            
+    def fill_pending(self):
+        
+        # The quotes are moved to the pending bytes when the previous ones were sent
+        if self.pending or not self._queue:
+            return
+            
+        if self._policy == 'conflate':
+            self.pending = b''.join(_QUOTE_STRUCT.pack(*values) for values in self._queue.values())
+            self._stats['sent'] += len(self._queue)
+            self._queue = {}
+        else:
+            self.pending = b''.join(item[1] for item in self._queue)
+            self._stats['sent'] += len(self._queue)
+            self._queue.clear()
+            
+    def sent(self, size):
+        
+        self.pending = self.pending[size:]
+        
+    def get_commands(self, data):
+        
+        self._commands += data
+        commands = []
+        
+        while len(self._commands) >= _COMMAND_STRUCT.size:
+            command, count = _COMMAND_STRUCT.unpack_from(self._commands)
+            size = _COMMAND_STRUCT.size + count * 8
+            if size > self._max_command_size:
+                raise ValueError('Gateway command too large: {} bytes'.format(size))
+            if len(self._commands) < size:
+                break
+                
+            pair_ids = list(struct.unpack_from('<{}q'.format(count), self._commands, _COMMAND_STRUCT.size))
+            commands.append((command, pair_ids))
+            self._commands = self._commands[size:]
+            
+        return commands
+        
+    def stats(self):
+        
+        result = dict(self._stats)
+        result['address'] = self.address
+        result['pairs'] = len(self.pairs)
+        result['depth'] = len(self._queue)
+        
+        return result
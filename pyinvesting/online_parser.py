@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .jsonlib import loads
+
+import random
+import json
+
+import pandas as pd
+import numpy as np
+
+# Fields of every quote, in the same order as the quotes dataframe columns (datetime is kept as a unix timestamp)
+QUOTE_FIELDS = ('pair_id', 'bid', 'ask', 'last', 'high', 'low', 'change', 'turnover', 'previous_close', 'timestamp')
+
+# NumPy dtype of the quotes arrays (snapshots, tick history, journals and shared memory)
+QUOTE_DTYPE = np.dtype([('pair_id', np.int64)] + [(field, np.float64) for field in QUOTE_FIELDS[1:]])
+
+# Field of the stream server message used for every quote field
+_MESSAGE_FIELDS = (('bid', 'bid'), ('ask', 'ask'), ('last', 'last'), ('high', 'high'), ('low', 'low'), 
+    ('change', 'pcp'), ('turnover', 'turnover_numeric'), ('previous_close', 'pc'), ('timestamp', 'timestamp'))
+
+class QuoteRecord:
+    """
+    Compact representation of the quote received in a message. 
+    
+    The fields are the same as the quotes dataframe columns, but the datetime is the unix timestamp 
+    and the missing values are NaN.
+    """
+    
+    __slots__ = ('ticker',) + QUOTE_FIELDS
+    
+    def __init__(self, pair_id, bid=np.nan, ask=np.nan, last=np.nan, high=np.nan, low=np.nan, 
+        change=np.nan, turnover=np.nan, previous_close=np.nan, timestamp=np.nan, ticker=None):
+        
+        self.pair_id = pair_id
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+        self.high = high
+        self.low = low
+        self.change = change
+        self.turnover = turnover
+        self.previous_close = previous_close
+        self.timestamp = timestamp
+        self.ticker = ticker if ticker is not None else pair_id
+        
+    def to_frame(self):
+        """
+        Returns the quote as a one row dataframe with the same format as the one received by Online.on_quotes.
+        """
+        
+        return OnlineParser().get_quotes_frame([self])
+        
+    def __repr__(self):
+        
+        return 'QuoteRecord({})'.format(', '.join('{}={}'.format(field, getattr(self, field)) for field in self.__slots__))
+
+class OnlineParser:
+    
+########################
+#### PUBLIC METHODS ####
+########################
+    def get_websocket_url(self, stream_server):
+        """
+        Returns a new websocket URL for the specified stream server.
+        
+        Parameters
+        ----------
+        stream_server : str
+            The stream server returned by OnlineScrapping.get_stream_server.
+        """
+        
+        return 'wss://{}/echo/{}/{}/websocket'.format(
+            stream_server, 
+            random.randrange(0, 1000), 
+            ''.join(random.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(8)))
+
+    def get_event_message(self, event):
+        """
+        Returns the websocket frame used to send an event to the stream server.
+        
+        Parameters
+        ----------
+        event : dict
+            The event to be sent. Ex. {'_event': 'subscribe', 'tzID': 8, 'message': 'pid-1:'}
+        """
+        
+        return self.get_events_message([event])
+
+    def get_events_message(self, events):
+        """
+        Returns the websocket frame used to send several events to the stream server at once.
+        
+        Parameters
+        ----------
+        events : list
+            The events to be sent (see get_event_message).
+        """
+        
+        return json.dumps([json.dumps(event) for event in events])
+
+    def get_subscription_message(self, event_type, pair_id):
+        """
+        Returns the websocket frame used to subscribe or unsubscribe a pair_id.
+        
+        Parameters
+        ----------
+        event_type : str
+            The event type. Valid values: subscribe, unsubscribe
+        pair_id : int
+            The pair_id that identify the asset.
+        """
+        
+        return self.get_event_message({'_event': event_type, 'tzID': 8, 'message': 'pid-{}:'.format(pair_id)})
+
+    def get_subscription_messages(self, event_type, pair_ids, chunk_size=100):
+        """
+        Returns the websocket frames used to subscribe or unsubscribe several pair_ids.
+        
+        Every frame has up to chunk_size subscription events.
+        
+        Parameters
+        ----------
+        event_type : str
+            The event type. Valid values: subscribe, unsubscribe
+        pair_ids : list
+            The pair_ids that identify the assets.
+        chunk_size : int
+            Maximum events sent in every frame.
+        """
+        
+        events = [{'_event': event_type, 'tzID': 8, 'message': 'pid-{}:'.format(pair_id)} for pair_id in pair_ids]
+        chunk_size = max(int(chunk_size), 1)
+        
+        return [self.get_events_message(events[i:i + chunk_size]) for i in range(0, len(events), chunk_size)]
+
+    def get_heartbeat_message(self):
+        """
+        Returns the websocket frame used to send a heartbeat to the stream server.
+        """
+        
+        return self.get_event_message({'_event': 'heartbeat', 'message': 'h'})
+
+    def get_quotes_from_message(self, message):
+        """
+        Parses and returns a dataframe with the quotes received in a message.
+        
+        Parameters
+        ----------
+        message : str
+            The quotes message received from the websocket.
+        """
+        
+        # Clean message (Remove backslashed, percentage, comma from numbers, and the non used suffix/prefix)
+        message = message.replace('\\', '').replace('%','').replace(',"',';"').replace(",","").replace(';"',',"')
+        message = message[message.index('::') + 2:len(message) - 4]
+        quotes_df = pd.DataFrame(json.loads(message), index=[0])
+        
+        raw_cols = ['pid', 'bid', 'ask', 'last', 'high', 'low', 'pcp', 'turnover_numeric', 'pc', 'timestamp']
+        for col in raw_cols:
+            if not col in quotes_df.columns:
+                quotes_df[col] = np.nan
+        quotes_df = quotes_df[raw_cols]
+        
+        cols = ['pair_id', 'bid', 'ask', 'last', 'high', 'low', 'change', 'turnover', 'previous_close', 'timestamp']
+        quotes_df.columns = cols        
+        quotes_df[cols] = quotes_df[cols].apply(pd.to_numeric) 
+        quotes_df['previous_close'] = quotes_df['last'] - quotes_df['previous_close']
+        quotes_df['datetime'] = pd.to_datetime(quotes_df['timestamp'], unit='s')
+        quotes_df = quotes_df[['pair_id', 'bid', 'ask', 'last', 'high', 'low', 'change', 'turnover', 'previous_close', 'datetime']]
+              
+        return quotes_df
+
+    def get_quote_from_message(self, message):
+        """
+        Parses and returns a QuoteRecord with the quote received in a message.
+        
+        It is the fast version of get_quotes_from_message, no dataframe is created.
+        
+        Parameters
+        ----------
+        message : str
+            The quotes message received from the websocket.
+        """
+        
+        # Remove the backslashes and the non used suffix/prefix to get the quote JSON object
+        message = message.replace('\\', '')
+        data = json.loads(message[message.index('::') + 2:len(message) - 4])
+        
+        return self._get_quote_record(data)
+
+    def get_frame_events(self, message):
+        """
+        Parses all the messages of a SockJS array frame (a[...]) received from the stream server.
+        
+        The server can send several messages in the same frame, so every message is decoded 
+        (instead of only the first one, as get_quote_from_message does).
+        It returns a tuple with the list of QuoteRecord objects (in the order received) 
+        and the number of heartbeat responses found in the frame.
+        
+        Parameters
+        ----------
+        message : str
+            The message received from the websocket.
+        """
+        
+        quotes = []
+        heartbeats = 0
+        
+        if not message or message[0] != 'a':
+            return quotes, heartbeats
+            
+        for item in loads(message[1:]):
+            event = loads(item) if isinstance(item, str) else item
+            if event.get('_event') == 'heartbeat':
+                heartbeats += 1
+                continue
+                
+            content = event.get('message')
+            if content:
+                # Ex. pid-8873::{"pid":"8873","last":"30,000.0",...}
+                position = content.find('::')
+                if position > 0 and content.startswith('pid-'):
+                    quotes.append(self._get_quote_record(loads(content[position + 2:])))
+                
+        return quotes, heartbeats
+
+    def get_quotes_frame(self, records):
+        """
+        Returns a dataframe with the quotes of several records.
+        
+        The format is the same as the one received by Online.on_quotes (the index is the pair_id).
+        
+        Parameters
+        ----------
+        records : list
+            The QuoteRecord objects to be included.
+        """
+        
+        columns = {'ticker': [record.ticker for record in records]}
+        for field, dtype in QUOTE_DTYPE.fields.items():
+            columns[field] = np.fromiter((getattr(record, field) for record in records), dtype[0], len(records))
+            
+        return self.get_quotes_frame_from_columns(columns)
+
+    def get_quotes_frame_from_columns(self, columns):
+        """
+        Returns a dataframe with the quotes stored in column arrays.
+        
+        The format is the same as the one returned by get_quotes_frame.
+        The arrays are not copied, so they must not be modified after calling this method.
+        
+        Parameters
+        ----------
+        columns : dict
+            The ticker and QUOTE_FIELDS arrays with the same length.
+        """
+        
+        data = {'ticker': columns['ticker']}
+        for field in QUOTE_FIELDS[1:-1]:
+            data[field] = columns[field]
+            
+        data['datetime'] = pd.to_datetime(columns['timestamp'], unit='s')
+        
+        return pd.DataFrame(data, index=pd.Index(columns['pair_id'], name='pair_id'), copy=False)
+
+    def get_quotes_from_frame(self, quotes):
+        """
+        Returns a list of QuoteRecord with the quotes of a dataframe.
+        
+        Parameters
+        ----------
+        quotes : dataframe
+            The quotes with the format returned by get_quotes_from_message.
+        """
+        
+        timestamps = (quotes['datetime'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+        return [QuoteRecord(int(row.pair_id), row.bid, row.ask, row.last, row.high, row.low, row.change, 
+            row.turnover, row.previous_close, timestamp) for row, timestamp in zip(quotes.itertuples(index=False), timestamps)]
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_quote_record(self, data):
+        
+        record = QuoteRecord(int(data['pid']))
+        for field, key in _MESSAGE_FIELDS:
+            value = data.get(key)
+            if value is not None:
+                setattr(record, field, self._get_number(value))
+        
+        # The server sends the change in the pc field, the previous close is calculated from the last price
+        record.previous_close = record.last - record.previous_close
+        return record
+        
+    def _get_number(self, value):
+        
+        try:
+            return float(value)
+        except ValueError:
+            pass
+            
+        # Remove the thousands separator and the percentage (Ex. 1,234.5 or +0.25%)
+        try:
+            return float(value.replace(',', '').replace('%', ''))
+        except ValueError:
+            return np.nan
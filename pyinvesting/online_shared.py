@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import QUOTE_DTYPE
+
+from threading import Lock
+
+import time
+import uuid
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError: # Python < 3.8
+    shared_memory = None
+
+# Every record is the sequence number of the quote (starting at 1, 0 while it is written) and the quote
+SHARED_DTYPE = np.dtype([('sequence', np.uint64)] + QUOTE_DTYPE.descr)
+
+# Header: magic, capacity, record size and records written (uint64 each)
+_SHARED_MAGIC = int.from_bytes(b'PYINVSQ1', 'little')
+_HEADER_SIZE = 4
+
+class QuotePublisher:
+    
+    def __init__(self, name=None, capacity=65536):
+        """
+        Class constructor 
+        
+        Publishes the quotes in a shared memory ring buffer, so several local processes can read them 
+        with QuoteSubscriber without opening their own connections.
+        It is attached to an Online instance with Online.attach.
+        
+        The ring buffer is mirrored (every quote is written twice, capacity positions apart),
+        so the readers always receive contiguous views without copies.
+        Python 3.8+ is required (multiprocessing.shared_memory).
+        
+        Ex. 
+            publisher = QuotePublisher('quotes')
+            online.attach(publisher)
+        
+        Parameters
+        ----------
+        name : str, optional
+            The name of the shared memory block used by the subscribers.
+            If it is not specified, a random name is used (see the name property).
+        capacity : int
+            Number of quotes kept in the ring buffer. 
+            The readers that are more than capacity quotes behind lose the oldest ones.
+        """
+        
+        if shared_memory is None:
+            raise ImportError('multiprocessing.shared_memory is required to share the quotes (Python 3.8+)')
+            
+        self._capacity = max(int(capacity), 1)
+        self._memory = shared_memory.SharedMemory(name=name if name else 'pyinvesting-{}'.format(uuid.uuid4().hex[:12]), 
+            create=True, size=_HEADER_SIZE * 8 + self._capacity * 2 * SHARED_DTYPE.itemsize)
+        
+        self._header, self._ring = _get_arrays(self._memory, self._capacity)
+        self._header[:] = (_SHARED_MAGIC, self._capacity, SHARED_DTYPE.itemsize, 0)
+        
+        self._count = 0
+        self._lock = Lock()
+
+    @property
+    def name(self):
+        """
+        The name of the shared memory block.
+        """
+        
+        return self._memory.name
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def on_quote(self, quote):
+        """
+        Writes a quote in the ring buffer. It is called by Online for every quote received.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote received.
+        """
+        
+        with self._lock:
+            if self._ring is None:
+                return
+                
+            values = (0, quote.pair_id, quote.bid, quote.ask, quote.last, quote.high, quote.low, 
+                quote.change, quote.turnover, quote.previous_close, quote.timestamp)
+            
+            # The sequence is set after the quote is written, so the readers detect the overwritten records
+            position = self._count % self._capacity
+            self._ring[position] = values
+            self._ring[position + self._capacity] = values
+            self._ring['sequence'][[position, position + self._capacity]] = self._count + 1
+            
+            # The quote is visible to the readers after it is completely written
+            self._count += 1
+            self._header[3] = self._count
+            
+    def stats(self):
+        """
+        Returns a dictionary with the quotes published (published key) and the capacity of the ring buffer.
+        """
+        
+        return {'published': self._count, 'capacity': self._capacity}
+        
+    def close(self):
+        """
+        Closes and removes the shared memory block. The subscribers already attached keep their mapping.
+        """
+        
+        with self._lock:
+            if self._ring is None:
+                return
+            self._header = None
+            self._ring = None
+            
+        self._memory.close()
+        
+        # A forked subscriber shares the resource tracker and unregisters the block when it is attached (see _attach)
+        resource_tracker.register(self._memory._name, 'shared_memory')
+        self._memory.unlink()
+
+class QuoteSubscriber:
+    
+    def __init__(self, name, start='latest', poll_interval=0.001):
+        """
+        Class constructor 
+        
+        Reads the quotes published by a QuotePublisher of another process. 
+        Every subscriber has its own position, so any number of subscribers can read the same quotes.
+        
+        Ex. 
+            subscriber = QuoteSubscriber('quotes')
+            while True:
+                quotes = subscriber.read(timeout=1)
+        
+        Parameters
+        ----------
+        name : str
+            The name of the shared memory block of the publisher.
+        start : str
+            The first quote read. Valid values:
+                - latest: The quotes published after the subscriber is created.
+                - oldest: The oldest quote kept in the ring buffer.
+        poll_interval : float
+            Seconds between the checks for new quotes when read waits.
+        """
+        
+        if shared_memory is None:
+            raise ImportError('multiprocessing.shared_memory is required to share the quotes (Python 3.8+)')
+        if start not in ['latest', 'oldest']:
+            raise ValueError('Invalid start: {}'.format(start))
+            
+        self._memory = _attach(name)
+        
+        header = np.ndarray((_HEADER_SIZE,), dtype=np.uint64, buffer=self._memory.buf)
+        if header[0] != _SHARED_MAGIC or header[2] != SHARED_DTYPE.itemsize:
+            self._memory.close()
+            raise ValueError('Invalid quotes shared memory: {}'.format(name))
+            
+        self._capacity = int(header[1])
+        self._header, self._ring = _get_arrays(self._memory, self._capacity)
+        self._poll_interval = poll_interval
+        
+        count = int(self._header[3])
+        self._position = count if start == 'latest' else max(count - self._capacity, 0)
+        self._stats = {'read': 0, 'lagged': 0, 'dropped': 0}
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def read(self, max_count=None, timeout=None):
+        """
+        Returns a read-only NumPy structured array (SHARED_DTYPE) with the quotes published since the previous read,
+        from the oldest to the newest. The missing values of the partial quotes are NaN.
+        
+        The array is a view of the shared memory, without copies, so it is valid until the publisher writes 
+        capacity more quotes. It should be copied to keep it.
+        If the subscriber is more than capacity quotes behind, the oldest quotes are lost (see stats).
+        
+        Parameters
+        ----------
+        max_count : int, optional
+            Maximum number of quotes returned. If it is not specified, all the quotes available are returned.
+        timeout : float, optional
+            Seconds to wait for new quotes. If it is not specified, it returns immediately (the array can be empty).
+        """
+        
+        count = int(self._header[3])
+        if count == self._position and timeout:
+            deadline = time.monotonic() + timeout
+            while count == self._position and time.monotonic() < deadline:
+                time.sleep(self._poll_interval)
+                count = int(self._header[3])
+                
+        dropped = self._skip_lost(count)
+        
+        size = count - self._position
+        if max_count is not None:
+            size = min(size, max_count)
+            
+        start = self._position % self._capacity
+        result = self._ring[start:start + size]
+        result.flags.writeable = False
+        
+        # The oldest quotes of the view are discarded if the publisher started overwriting them 
+        # (their sequence is not the expected one)
+        overwritten = self._get_overwritten(result['sequence'])
+        if overwritten:
+            dropped += overwritten
+            result = result[overwritten:]
+            
+        if dropped:
+            self._stats['lagged'] += 1
+            self._stats['dropped'] += dropped
+            
+        self._position += size
+        self._stats['read'] += len(result)
+        return result
+        
+    def lag(self):
+        """
+        Returns the number of quotes published and not read yet.
+        """
+        
+        return int(self._header[3]) - self._position
+        
+    def stats(self):
+        """
+        Returns a dictionary with the health of the subscriber.
+        
+        The keys are:
+            - read: Quotes read.
+            - lagged: Times the subscriber was more than capacity quotes behind.
+            - dropped: Quotes lost because the subscriber was behind.
+            - lag: Quotes published and not read yet.
+        """
+        
+        result = dict(self._stats)
+        result['lag'] = self.lag()
+        return result
+        
+    def close(self):
+        """
+        Closes the shared memory block. The arrays returned by read must not be used after closing it.
+        """
+        
+        self._header = None
+        self._ring = None
+        self._memory.close()
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _skip_lost(self, count):
+        
+        # The quotes before count - capacity were overwritten by the publisher
+        oldest = count - self._capacity
+        if self._position >= oldest:
+            return 0
+            
+        dropped = oldest - self._position
+        self._position = oldest
+        return dropped
+        
+    def _get_overwritten(self, sequences):
+        
+        # The publisher overwrites the records in order, so the overwritten ones are the first ones of the view
+        expected = np.arange(self._position + 1, self._position + len(sequences) + 1, dtype=np.uint64)
+        valid = sequences == expected
+        return int(np.argmax(valid)) if valid.any() else len(valid)
+
+def _get_arrays(memory, capacity):
+    
+    header = np.ndarray((_HEADER_SIZE,), dtype=np.uint64, buffer=memory.buf)
+    ring = np.ndarray((capacity * 2,), dtype=SHARED_DTYPE, buffer=memory.buf, offset=_HEADER_SIZE * 8)
+    return header, ring
+    
+def _attach(name):
+    
+    # The subscribers must not remove the shared memory block of the publisher when they finish
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # Python < 3.13
+        pass
+        
+    # The block is registered when it is attached, so it is unregistered to keep it after the subscriber finishes
+    memory = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import OnlineParser, QuoteRecord, QUOTE_DTYPE
+
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+class QuoteSnapshot:
+    
+    def __init__(self, on_snapshot=None, interval_ms=250, on_error=None, capacity=64):
+        """
+        Class constructor 
+        
+        Table with the latest state of every pair_id. 
+        The partial quotes are merged in place, so the missing values keep the last value received.
+        
+        Parameters
+        ----------
+        on_snapshot : function(quotes), optional
+            Callable object which is called every interval with a dataframe that has the latest state 
+            of the pair_ids updated in the interval (one row per pair_id).
+        interval_ms : int
+            Milliseconds between the on_snapshot calls.
+        on_error : function(exception), optional
+            Callable object which is called when on_snapshot raises an exception.
+        capacity : int
+            Initial number of pair_ids in the table. It grows when it is needed.
+        """
+        
+        self._on_snapshot = on_snapshot
+        self._interval = interval_ms / 1000.0
+        self._on_error = on_error
+        self._parser = OnlineParser()
+        
+        self._rows = {}
+        self._size = 0
+        self._columns = self._get_columns(max(int(capacity), 1))
+        self._dirty = set()
+        
+        self._lock = Lock()
+        
+        self._thread = None
+        self._thread_event = None
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def start(self):
+        """
+        Starts the thread that calls on_snapshot every interval.
+        """
+        
+        if self._thread or not self._on_snapshot:
+            return
+            
+        self._thread_event = Event()
+        self._thread = Thread(target=self._notifier)
+        self._thread.daemon = True
+        self._thread.start()
+        
+    def stop(self):
+        """
+        Stops the on_snapshot thread.
+        """
+        
+        if self._thread:
+            self._thread_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def update(self, quote):
+        """
+        Merges a quote in the table. The NaN values of the quote do not change the table.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote to be merged.
+        """
+        
+        with self._lock:
+            row = self._rows.get(quote.pair_id)
+            if row is None:
+                row = self._add_row(quote.pair_id)
+                
+            columns = self._columns
+            columns['ticker'][row] = quote.ticker
+            for field in QUOTE_DTYPE.names[1:]:
+                value = getattr(quote, field)
+                if value == value: # It is not NaN
+                    columns[field][row] = value
+                    
+            self._dirty.add(row)
+            
+    def get(self, pair_id):
+        """
+        Returns a QuoteRecord with the latest state of a pair_id or None if it was not received.
+        
+        Parameters
+        ----------
+        pair_id : int
+            The pair_id that identify the asset.
+        """
+        
+        with self._lock:
+            row = self._rows.get(pair_id)
+            if row is None:
+                return None
+                
+            columns = self._columns
+            values = [columns[field][row].item() for field in QUOTE_DTYPE.names[1:]]
+            return QuoteRecord(pair_id, *values, ticker=columns['ticker'][row])
+            
+    def get_timestamps(self, pair_ids):
+        """
+        Returns a dictionary with the timestamp of the last quote received for every pair_id.
+        The pair_ids without quotes are not included.
+        
+        Parameters
+        ----------
+        pair_ids : list
+            The pair_ids that identify the assets.
+        """
+        
+        result = {}
+        with self._lock:
+            timestamps = self._columns['timestamp']
+            for pair_id in pair_ids:
+                row = self._rows.get(pair_id)
+                if row is not None and timestamps[row] == timestamps[row]:
+                    result[pair_id] = timestamps[row].item()
+                    
+        return result
+
+    def get_frame(self):
+        """
+        Returns a dataframe with the latest state of every pair_id (one row per pair_id).
+        """
+        
+        with self._lock:
+            columns = {field: column[:self._size].copy() for field, column in self._columns.items()}
+            
+        return self._parser.get_quotes_frame_from_columns(columns)
+        
+    def get_array(self):
+        """
+        Returns a NumPy structured array (QUOTE_DTYPE) with the latest state of every pair_id.
+        """
+        
+        with self._lock:
+            result = np.empty(self._size, dtype=QUOTE_DTYPE)
+            for field in QUOTE_DTYPE.names:
+                result[field] = self._columns[field][:self._size]
+                
+        return result
+        
+    def __len__(self):
+        
+        return self._size
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_columns(self, capacity):
+        
+        columns = {'ticker': np.empty(capacity, dtype=object)}
+        for field, dtype in QUOTE_DTYPE.fields.items():
+            columns[field] = np.full(capacity, np.nan if dtype[0].kind == 'f' else 0, dtype=dtype[0])
+            
+        return columns
+        
+    def _add_row(self, pair_id):
+        
+        capacity = len(self._columns['pair_id'])
+        if self._size == capacity:
+            columns = self._get_columns(capacity * 2)
+            for field, column in self._columns.items():
+                columns[field][:capacity] = column
+            self._columns = columns
+            
+        row = self._size
+        self._columns['pair_id'][row] = pair_id
+        self._rows[pair_id] = row
+        self._size += 1
+        
+        return row
+        
+    def _get_dirty_frame(self):
+        
+        with self._lock:
+            if not self._dirty:
+                return None
+            rows = np.fromiter(sorted(self._dirty), np.int64, len(self._dirty))
+            self._dirty = set()
+            columns = {field: column[rows] for field, column in self._columns.items()}
+            
+        return self._parser.get_quotes_frame_from_columns(columns)
+        
+    def _notifier(self):
+        
+        while not self._thread_event.wait(self._interval):
+            try:
+                quotes = self._get_dirty_frame()
+                if quotes is not None:
+                    self._on_snapshot(quotes)
+            except Exception as ex:
+                if self._on_error:
+                    self._on_error(ex)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import OnlineParser, QUOTE_DTYPE
+
+from threading import Lock
+
+import numpy as np
+
+class TickHistory:
+    
+    def __init__(self, capacity=1000):
+        """
+        Class constructor 
+        
+        Keeps the last quotes received of every pair_id in fixed-size ring buffers.
+        
+        Every ring buffer is mirrored (each quote is written twice, capacity positions apart), 
+        so the last n quotes are always contiguous and they are returned as a view without copies.
+        
+        Parameters
+        ----------
+        capacity : int
+            Number of quotes kept for every pair_id. The oldest quotes are overwritten.
+        """
+        
+        self._capacity = max(int(capacity), 1)
+        self._parser = OnlineParser()
+        
+        # pair_id -> [array, count]
+        self._rings = {}
+        self._tickers = {}
+        self._lock = Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def on_quote(self, quote):
+        """
+        Adds a quote to the ring buffer of its pair_id.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote received.
+        """
+        
+        values = (quote.pair_id, quote.bid, quote.ask, quote.last, quote.high, quote.low, 
+            quote.change, quote.turnover, quote.previous_close, quote.timestamp)
+        
+        with self._lock:
+            ring = self._rings.get(quote.pair_id)
+            if ring is None:
+                ring = self._rings[quote.pair_id] = [np.zeros(self._capacity * 2, dtype=QUOTE_DTYPE), 0]
+            self._tickers[quote.pair_id] = quote.ticker
+            
+            array = ring[0]
+            position = ring[1] % self._capacity
+            array[position] = values
+            array[position + self._capacity] = values
+            ring[1] += 1
+            
+    def get(self, pair_id, n=None):
+        """
+        Returns a read-only NumPy structured array (QUOTE_DTYPE) with the last n quotes of a pair_id, 
+        from the oldest to the newest. The missing values of the partial quotes are NaN.
+        
+        The array is a view of the ring buffer, so it is overwritten when more than capacity - n quotes 
+        are received. It should be copied to keep it.
+        
+        Parameters
+        ----------
+        pair_id : int
+            The pair_id that identify the asset.
+        n : int, optional
+            Maximum number of quotes retrieved. If it is not specified, all the quotes kept are retrieved.
+        """
+        
+        with self._lock:
+            ring = self._rings.get(pair_id)
+            if ring is None:
+                return np.zeros(0, dtype=QUOTE_DTYPE)
+            array, count = ring
+            
+        size = min(count, self._capacity, n if n is not None else self._capacity)
+        end = (count - 1) % self._capacity + self._capacity + 1
+        
+        result = array[end - size:end]
+        result.flags.writeable = False
+        return result
+        
+    def get_frame(self, pair_id, n=None):
+        """
+        Returns a dataframe with the last n quotes of a pair_id, from the oldest to the newest.
+        
+        Parameters
+        ----------
+        pair_id : int
+            The pair_id that identify the asset.
+        n : int, optional
+            Maximum number of quotes retrieved. If it is not specified, all the quotes kept are retrieved.
+        """
+        
+        values = self.get(pair_id, n)
+        
+        columns = {field: values[field].copy() for field in QUOTE_DTYPE.names}
+        columns['ticker'] = np.full(len(values), self._tickers.get(pair_id, pair_id), dtype=object)
+        return self._parser.get_quotes_frame_from_columns(columns)
+        
+    def remove(self, pair_ids):
+        """
+        Removes the quotes of the pair_ids.
+        
+        Parameters
+        ----------
+        pair_ids : list
+            The pair_ids that identify the assets.
+        """
+        
+        with self._lock:
+            for pair_id in pair_ids:
+                self._rings.pop(pair_id, None)
+                self._tickers.pop(pair_id, None)
+                
+    def __len__(self):
+        
+        return len(self._rings)
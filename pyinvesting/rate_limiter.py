@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from threading import Condition
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+# Priorities of the requests, the lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+# Status codes retried by the transports, and the ones reported as throttling
+RETRY_STATUSES = (403, 429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (403, 429)
+
+def get_retry_delay(attempt, backoff_factor=0.5, max_backoff=30, retry_after=None):
+    """
+    Returns the seconds to wait before retrying a request (exponential backoff with full jitter).
+    
+    Parameters
+    ----------
+    attempt : int
+        The number of the retry, starting from 0.
+    backoff_factor : float
+        Seconds of the first backoff.
+    max_backoff : float
+        Maximum seconds to wait.
+    retry_after : str, optional
+        The Retry-After header sent by the server. It is used as the minimum delay.
+    """
+    
+    delay = random.uniform(0, min(backoff_factor * (2 ** attempt), max_backoff))
+    
+    try:
+        delay = max(delay, min(float(retry_after), max_backoff))
+    except (TypeError, ValueError):
+        pass
+        
+    return delay
+
+class RateLimiter:
+    
+    def __init__(self, rate=5, burst=None, adaptive=True, min_rate=0.5):
+        """
+        Class constructor 
+        
+        Token bucket rate limiter shared by all the requests of one or more transports.
+        When several requests are waiting, the ones with lower priority value are served first.
+        
+        Parameters
+        ----------
+        rate : float
+            Maximum number of requests per second.
+        burst : int, optional
+            Maximum number of requests sent at once after being idle.
+            If it is not specified, the value of rate will be used.
+        adaptive : bool
+            If it is True, the rate is halved every time the server throttles a request, 
+            and it grows back to the maximum rate while the requests succeed.
+        min_rate : float
+            Minimum number of requests per second when the rate is adapted.
+        """
+        
+        self._max_rate = float(rate)
+        self._rate = float(rate)
+        self._burst = float(burst if burst else max(rate, 1))
+        self._adaptive = adaptive
+        self._min_rate = min(float(min_rate), self._max_rate)
+        
+        self._tokens = self._burst
+        self._last_refill = time.monotonic()
+        
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = Condition()
+        
+        self._stats = {'acquired': 0, 'waited': 0, 'wait_time': 0.0, 'throttled': 0}
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """
+        Waits until a request can be sent.
+        
+        Parameters
+        ----------
+        priority : int
+            The priority of the request. The lower values are served first.
+            Ex. PRIORITY_INTERACTIVE (0) or PRIORITY_BULK (10)
+        """
+        
+        start = time.monotonic()
+        
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            
+            while True:
+                delay = self._try_acquire(entry)
+                if delay == 0:
+                    break
+                self._condition.wait(delay)
+                
+            self._add_wait_stats(start)
+            
+    async def acquire_async(self, priority=PRIORITY_INTERACTIVE):
+        """
+        Waits until a request can be sent without blocking the event loop.
+        
+        Parameters
+        ----------
+        priority : int
+            The priority of the request. The lower values are served first.
+        """
+        
+        start = time.monotonic()
+        
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_acquire(entry)
+                    if delay == 0:
+                        self._add_wait_stats(start)
+                        return
+                        
+                await asyncio.sleep(min(delay, 0.05) if delay else 0.05)
+        except BaseException:
+            with self._condition:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._condition.notify_all()
+            raise
+            
+    def throttled(self):
+        """
+        Reports that the server throttled a request.
+        """
+        
+        with self._condition:
+            self._stats['throttled'] += 1
+            if self._adaptive:
+                self._refill()
+                self._rate = max(self._rate / 2, self._min_rate)
+                self._tokens = min(self._tokens, 0)
+            
+    def succeeded(self):
+        """
+        Reports that the server accepted a request.
+        """
+        
+        if not self._adaptive or self._rate >= self._max_rate:
+            return
+            
+        with self._condition:
+            self._refill()
+            self._rate = min(self._rate + self._max_rate * 0.05, self._max_rate)
+            
+    def stats(self):
+        """
+        Returns a dictionary with the rate limiter counters.
+        
+        The keys are:
+            - acquired: Requests allowed.
+            - waited: Requests that had to wait.
+            - wait_time: Total seconds waited by the requests.
+            - throttled: Requests throttled by the server.
+            - rate: Current requests per second.
+            - waiting: Requests waiting right now.
+        """
+        
+        with self._condition:
+            result = dict(self._stats)
+            result['rate'] = self._rate
+            result['waiting'] = len(self._waiters)
+            
+        return result
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _refill(self):
+        
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._last_refill) * self._rate, self._burst)
+        self._last_refill = now
+        
+    def _try_acquire(self, entry):
+        
+        # Only the waiter with the highest priority can take a token, the rest wait for it
+        self._refill()
+        if self._waiters[0] != entry:
+            return None
+            
+        if self._tokens >= 1:
+            self._tokens -= 1
+            heapq.heappop(self._waiters)
+            self._condition.notify_all()
+            return 0
+            
+        return (1 - self._tokens) / self._rate
+        
+    def _add_wait_stats(self, start):
+        
+        waited = time.monotonic() - start
+        self._stats['acquired'] += 1
+        if waited > 0.001:
+            self._stats['waited'] += 1
+            self._stats['wait_time'] += waited
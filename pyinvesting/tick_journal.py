@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Investing.com API - Market and historical data downloader
+# https://github.com/crapher/pyinvesting.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from .online_parser import OnlineParser, QuoteRecord, QUOTE_DTYPE
+
+from threading import Thread, Event, Lock
+
+import glob
+import os
+import time
+
+import numpy as np
+
+# Every journal record is a quote and the time it was received (unix timestamp)
+JOURNAL_DTYPE = np.dtype(QUOTE_DTYPE.descr + [('received', np.float64)])
+
+# File header: magic (8 bytes), record size (uint32) and reserved (uint32)
+_JOURNAL_MAGIC = b'PYINVTK1'
+_JOURNAL_HEADER = np.dtype([('magic', 'S8'), ('record_size', '<u4'), ('reserved', '<u4')])
+
+class TickRecorder:
+    
+    def __init__(self, path, prefix='ticks', buffer_size=4096, fsync_interval=1.0, max_file_size=256 * 1024 * 1024):
+        """
+        Class constructor 
+        
+        Records the quotes in append-only binary files with fixed-width records (JOURNAL_DTYPE).
+        It is attached to an Online instance with Online.attach, and the files are replayed with TickReplay.
+        
+        Ex. 
+            recorder = TickRecorder('/data/ticks')
+            online.attach(recorder)
+        
+        Parameters
+        ----------
+        path : str
+            The directory where the journal files are written. It is created if it does not exist.
+        prefix : str
+            The prefix of the journal files (prefix.000001.tick, prefix.000002.tick, ...).
+        buffer_size : int
+            Quotes kept in memory before they are written to the file.
+        fsync_interval : float
+            Seconds between the writes of the buffered quotes to the disk (flush and fsync).
+        max_file_size : int
+            Bytes after which a new file is started.
+        """
+        
+        os.makedirs(path, exist_ok=True)
+        
+        self._path = path
+        self._prefix = prefix
+        self._fsync_interval = fsync_interval
+        self._max_file_size = max_file_size
+        
+        self._buffer = np.zeros(max(int(buffer_size), 1), dtype=JOURNAL_DTYPE)
+        self._size = 0
+        self._lock = Lock()
+        
+        self._file = None
+        self._file_index = self._get_last_index()
+        self._stats = {'records': 0, 'files': 0, 'fsyncs': 0}
+        
+        self._thread_event = Event()
+        self._thread = Thread(target=self._flusher)
+        self._thread.daemon = True
+        self._thread.start()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def on_quote(self, quote):
+        """
+        Adds a quote to the journal. It is called by Online for every quote received.
+        
+        Parameters
+        ----------
+        quote : QuoteRecord
+            The quote to be recorded.
+        """
+        
+        with self._lock:
+            if self._file is None and self._thread_event.is_set():
+                return
+                
+            self._buffer[self._size] = (quote.pair_id, quote.bid, quote.ask, quote.last, quote.high, quote.low, 
+                quote.change, quote.turnover, quote.previous_close, quote.timestamp, time.time())
+            self._size += 1
+            
+            if self._size == len(self._buffer):
+                self._write()
+                
+    def flush(self):
+        """
+        Writes the buffered quotes and syncs the file to the disk.
+        """
+        
+        with self._lock:
+            self._write()
+            if self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._stats['fsyncs'] += 1
+                
+    def close(self):
+        """
+        Writes the buffered quotes and closes the journal.
+        """
+        
+        self._thread_event.set()
+        self._thread.join()
+        
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+                
+    def stats(self):
+        """
+        Returns a dictionary with the records written, the files created and the fsyncs done.
+        """
+        
+        with self._lock:
+            return dict(self._stats)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_last_index(self):
+        
+        files = sorted(glob.glob(os.path.join(self._path, '{}.*.tick'.format(self._prefix))))
+        return int(files[-1].split('.')[-2]) if files else 0
+        
+    def _open_file(self):
+        
+        # A new file is always started, so the previous sessions are never modified
+        self._file_index += 1
+        name = os.path.join(self._path, '{}.{:06d}.tick'.format(self._prefix, self._file_index))
+        
+        self._file = open(name, 'xb')
+        self._file.write(np.array([(_JOURNAL_MAGIC, JOURNAL_DTYPE.itemsize, 0)], dtype=_JOURNAL_HEADER).tobytes())
+        self._stats['files'] += 1
+        
+    def _write(self):
+        
+        if self._size == 0:
+            return
+            
+        if self._file is None or self._file.tell() >= self._max_file_size:
+            if self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+            self._open_file()
+            
+        self._file.write(self._buffer[:self._size].tobytes())
+        self._stats['records'] += self._size
+        self._size = 0
+        
+    def _flusher(self):
+        
+        while not self._thread_event.wait(self._fsync_interval):
+            self.flush()
+
+class TickReplay:
+    
+    def __init__(self, path, prefix='ticks', on_quotes=None, quotes_format='dataframe', speed=None, 
+        batch_size=None, tickers=None):
+        """
+        Class constructor 
+        
+        Replays the quotes recorded by TickRecorder with the same on_quotes interface as Online.
+        The journal files are memory-mapped, so they are not loaded in memory.
+        
+        Ex. 
+            replay = TickReplay('/data/ticks', on_quotes=on_quotes, speed=10)
+            replay.run()
+        
+        Parameters
+        ----------
+        path : str
+            The directory with the journal files, or the path of a journal file.
+        prefix : str
+            The prefix of the journal files.
+        on_quotes: function(self, quotes)
+            Callable object which is called with the quotes (see Online). It is required.
+        quotes_format : str
+            The format of the quotes received by on_quotes (see Online). 
+            It is ignored when batch_size is specified (the batches are dataframes).
+        speed : float, optional
+            The replay speed relative to the time the quotes were received (Ex. 1 is real time, 10 is 10 times faster).
+            If it is not specified, the quotes are replayed as fast as possible.
+        batch_size : int, optional
+            If it is specified, on_quotes receives dataframes with batch_size quotes (see Online batch_interval_ms).
+            The batches continue across the journal files, so only the last one can have less quotes.
+        tickers : dict, optional
+            The ticker of every pair_id. If it is not specified, the ticker is the pair_id.
+        """
+        
+        if quotes_format not in ['dataframe', 'record']:
+            raise ValueError('Invalid quotes format: {}'.format(quotes_format))
+        if on_quotes is None:
+            raise ValueError('The on_quotes callback is required')
+            
+        if os.path.isdir(path):
+            self._files = sorted(glob.glob(os.path.join(path, '{}.*.tick'.format(prefix))))
+        else:
+            self._files = [path]
+            
+        self._on_quotes = on_quotes
+        self._quotes_format = quotes_format
+        self._speed = speed
+        self._batch_size = batch_size
+        self._tickers = tickers if tickers else {}
+        self._parser = OnlineParser()
+        
+        self._stop_event = Event()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get_arrays(self):
+        """
+        Returns a list with a read-only memory-mapped array (JOURNAL_DTYPE) for every journal file.
+        """
+        
+        return [self._get_array(name) for name in self._files]
+        
+    def run(self):
+        """
+        Replays all the quotes calling on_quotes. It returns when all the quotes were replayed or stop is called.
+        It returns the number of quotes replayed.
+        """
+        
+        self._stop_event.clear()
+        
+        count = 0
+        start_time = time.monotonic()
+        first_received = None
+        chunk_size = self._batch_size if self._batch_size else 4096
+        
+        for chunk in self._get_chunks(chunk_size):
+            if first_received is None:
+                first_received = chunk['received'][0]
+                
+            # The quotes are not delivered after stop is called (the waits return immediately)
+            if self._batch_size:
+                self._wait(chunk['received'][-1], first_received, start_time)
+                if self._stop_event.is_set():
+                    break
+                self._on_quotes(self, self._get_frame(chunk))
+                count += len(chunk)
+            else:
+                for row, received in zip(chunk.tolist(), chunk['received']):
+                    self._wait(received, first_received, start_time)
+                    if self._stop_event.is_set():
+                        break
+                    quote = QuoteRecord(*row[:-1])
+                    quote.ticker = self._tickers.get(quote.pair_id, quote.pair_id)
+                    self._on_quotes(self, [quote] if self._quotes_format == 'record' else self._parser.get_quotes_frame([quote]))
+                    count += 1
+                    
+            if self._stop_event.is_set():
+                break
+                
+        return count
+        
+    def stop(self):
+        """
+        Stops the replay started with run.
+        """
+        
+        self._stop_event.set()
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def _get_array(self, name):
+        
+        header = np.fromfile(name, dtype=_JOURNAL_HEADER, count=1)
+        if len(header) == 0 or header[0]['magic'] != _JOURNAL_MAGIC or header[0]['record_size'] != JOURNAL_DTYPE.itemsize:
+            raise ValueError('Invalid journal file: {}'.format(name))
+            
+        # Ignore a partial record at the end of a file that is still being written
+        count = (os.path.getsize(name) - _JOURNAL_HEADER.itemsize) // JOURNAL_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=JOURNAL_DTYPE)
+            
+        return np.memmap(name, dtype=JOURNAL_DTYPE, mode='r', offset=_JOURNAL_HEADER.itemsize, shape=(count,))
+        
+    def _get_chunks(self, chunk_size):
+        
+        # The quotes left at the end of a file are completed with the first ones of the next file
+        pending = None
+        for records in self.get_arrays():
+            start = 0
+            if pending is not None:
+                start = chunk_size - len(pending)
+                pending = np.concatenate([pending, records[:start]])
+                if len(pending) < chunk_size:
+                    continue
+                yield pending
+                pending = None
+                
+            for position in range(start, len(records), chunk_size):
+                chunk = records[position:position + chunk_size]
+                if len(chunk) < chunk_size:
+                    pending = chunk
+                else:
+                    yield chunk
+                    
+        if pending is not None and len(pending):
+            yield pending
+            
+    def _get_frame(self, chunk):
+        
+        columns = {field: np.array(chunk[field]) for field in QUOTE_DTYPE.names}
+        
+        # The ticker is looked up once per pair_id instead of once per quote
+        pair_ids, positions = np.unique(columns['pair_id'], return_inverse=True)
+        tickers = np.array([self._tickers.get(pair_id, pair_id) for pair_id in pair_ids.tolist()], dtype=object)
+        columns['ticker'] = tickers[positions]
+        
+        return self._parser.get_quotes_frame_from_columns(columns)
+        
+    def _wait(self, received, first_received, start_time):
+        
+        if not self._speed:
+            return
+            
+        delay = (received - first_received) / self._speed - (time.monotonic() - start_time)
+        if delay > 0:
+            self._stop_event.wait(delay)
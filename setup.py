@@ -46,5 +46,6 @@ setup(
     platforms=['any'],
     keywords='pandas, investing, online, historical, downloader, finance',
     packages=find_packages(exclude=['contrib', 'docs', 'tests', 'examples']),
-    install_requires=['pandas>=1.0.0', 'numpy>=1.18.1', 'requests>=2.21.0', 'websocket-client>=0.57.0', 'pyquery>=1.2']
+    install_requires=['pandas>=1.0.0', 'numpy>=1.18.1', 'requests>=2.21.0', 'websocket-client>=0.57.0', 'pyquery>=1.2'],
+    extras_require={'async': ['aiohttp>=3.6'], 'fast': ['orjson>=3.0']}
 )